@@ -0,0 +1,51 @@
+"""
+Optional speedups shared by the top-level Helios scripts
+
+Each falls back to the standard library when its package is not installed.
+"""
+
+import asyncio
+import json
+import sys
+
+# orjson reads and writes JSON several times faster than the stdlib
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+# uvloop has a faster event loop than asyncio's default
+try:
+    import uvloop
+except ImportError:
+    uvloop = None
+
+# Slotted dataclasses drop the per-instance __dict__ (Python 3.10+)
+SLOTS = {"slots": True} if sys.version_info >= (3, 10) else {}
+
+if orjson is not None:
+    loads = orjson.loads
+
+    def dumps(obj, default=None) -> bytes:
+        return orjson.dumps(obj, default=default)
+
+    def dumps_indented(obj, default=None) -> bytes:
+        return orjson.dumps(obj, default=default, option=orjson.OPT_INDENT_2)
+else:
+    loads = json.loads
+
+    def dumps(obj, default=None) -> bytes:
+        return json.dumps(obj, default=default).encode('utf-8')
+
+    def dumps_indented(obj, default=None) -> bytes:
+        return json.dumps(obj, indent=2, default=default).encode('utf-8')
+
+if uvloop is None:
+    run = asyncio.run
+elif hasattr(uvloop, "run"):
+    run = uvloop.run
+else:
+    # uvloop.run arrived in 0.18; older releases only install a loop policy
+    def run(main):
+        uvloop.install()
+        return asyncio.run(main)
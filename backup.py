@@ -4,47 +4,471 @@ Helios Backup and Recovery Tool
 Backup configurations, models, and restore system state
 """
 
+import io
 import os
+import copy
+import hashlib
+import gzip
 import json
 import shutil
 import tarfile
 import argparse
+import subprocess
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
 from datetime import datetime
 from pathlib import Path
 
+try:
+    import zstandard as zstd
+except ImportError:
+    zstd = None
+
+from _compat import loads as _loads
+
+# Archive suffix for each supported compression format
+ARCHIVE_SUFFIXES = {
+    "zstd": ".tar.zst",
+    "gzip": ".tar.gz"
+}
+
+# Suffix of the uncompressed archive holding already-compact build output
+ARTIFACTS_SUFFIX = ".artifacts.tar"
+
+# File state of the last backup, used to decide what an incremental skips
+INDEX_FILE = ".index.json"
+
+# An incremental chain is cut with a full backup every this many backups
+FULL_BACKUP_INTERVAL = 7
+
+# Size of each independently compressed gzip member on the in-process path
+GZIP_CHUNK_SIZE = 2 * 1024 * 1024
+
+# Bounds for the filesystem-derived tarfile copy buffer
+MIN_TAR_BUFSIZE = 64 * 1024
+MAX_TAR_BUFSIZE = 1024 * 1024
+
+# tarfile._Stream internals the sendfile path writes around; members go
+# through plain addfile() on a tarfile that lacks any of them
+_STREAM_ATTRS = ("buf", "pos", "fileobj")
+
+def _find_compressor(compression):
+    """Return the command for the fastest available native compressor"""
+    if compression == "zstd":
+        executable = shutil.which("zstd")
+        return [executable, "-T0", "-q", "-c"] if executable else None
+    
+    # pigz parallelizes DEFLATE across cores; plain gzip still beats zlib
+    # driven from the interpreter
+    for program in ("pigz", "gzip"):
+        executable = shutil.which(program)
+        if executable:
+            return [executable, "-c"]
+    return None
+
+def _have_native_tar():
+    """Check whether a tar binary is on PATH"""
+    return shutil.which("tar") is not None
+
+def _native_extract_command(backup_file, target_path):
+    """Build a native tar command that extracts a backup, if possible"""
+    if not _have_native_tar():
+        return None
+    
+    command = [shutil.which("tar"), "-x"]
+    if backup_file.name.endswith(ARCHIVE_SUFFIXES["gzip"]):
+        # pigz decompresses on a separate thread from tar's own I/O
+        pigz = shutil.which("pigz")
+        command.append(f"--use-compress-program={pigz}" if pigz else "-z")
+    elif backup_file.name.endswith(ARCHIVE_SUFFIXES["zstd"]):
+        zstd_binary = shutil.which("zstd")
+        if not zstd_binary:
+            return None
+        command.append(f"--use-compress-program={zstd_binary}")
+    
+    return command + ["-f", str(backup_file), "-C", str(target_path)]
+
+def _zstd_available():
+    """Check whether zstd archives can be written and read"""
+    return zstd is not None or shutil.which("zstd") is not None
+
+def _read_manifest(tar):
+    """Return the manifest of an open archive, or None if it has none"""
+    # Iterating reads headers lazily, so this stops as soon as the manifest
+    # turns up instead of indexing the whole archive like getnames() does.
+    # It also works for stream-mode archives, which cannot seek back.
+    for member in tar:
+        if member.name == "manifest.json":
+            return _loads(tar.extractfile(member).read())
+    return None
+
+class _BackupTarFile(tarfile.TarFile):
+    """Write-only TarFile used to create backups
+    
+    Member data moves with os.sendfile when the output is a raw fd, and
+    members are not retained once written.
+    """
+    
+    def addfile(self, tarinfo, fileobj=None):
+        out_fd = self._raw_output_fd()
+        in_fd = _raw_fd(fileobj)
+        if out_fd is None or in_fd is None or not tarinfo.isreg():
+            super().addfile(tarinfo, fileobj)
+        else:
+            self._sendfile_member(tarinfo, fileobj, out_fd, in_fd)
+        
+        # Nothing reads the member list back while writing, so don't let
+        # it grow with the number of files archived
+        self.members.clear()
+    
+    def _sendfile_member(self, tarinfo, fileobj, out_fd, in_fd):
+        """Write a regular file member, copying its body with os.sendfile"""
+        self._check("awx")
+        tarinfo = copy.copy(tarinfo)
+        
+        buf = tarinfo.tobuf(self.format, self.encoding, self.errors)
+        self.fileobj.write(buf)
+        self.offset += len(buf)
+        
+        # Flush what the stream has buffered so the header precedes the body
+        stream = self.fileobj
+        if stream.buf:
+            stream.fileobj.write(stream.buf)
+            stream.buf = b""
+        stream.fileobj.flush()
+        
+        offset = fileobj.tell()
+        remaining = tarinfo.size
+        while remaining:
+            sent = os.sendfile(out_fd, in_fd, offset, remaining)
+            if sent == 0:
+                raise OSError("unexpected end of data")
+            offset += sent
+            remaining -= sent
+        stream.pos += tarinfo.size
+        
+        blocks, remainder = divmod(tarinfo.size, tarfile.BLOCKSIZE)
+        if remainder > 0:
+            self.fileobj.write(tarfile.NUL * (tarfile.BLOCKSIZE - remainder))
+            blocks += 1
+        self.offset += blocks * tarfile.BLOCKSIZE
+    
+    def _raw_output_fd(self):
+        """Return the output fd if member data can bypass the tar stream"""
+        # Only an uncompressed stream ("w|") writes straight to its fileobj
+        stream = self.fileobj
+        if not hasattr(os, "sendfile") or getattr(stream, "comptype", None) != "tar":
+            return None
+        if not all(hasattr(stream, name) for name in _STREAM_ATTRS):
+            return None
+        return _raw_fd(stream.fileobj)
+
+class _ParallelGzipWriter:
+    """File-like writer that gzips fixed-size chunks on a thread pool
+    
+    Concatenated gzip members are a valid gzip file, so each chunk is
+    compressed independently (zlib releases the GIL) and written in order.
+    """
+    
+    def __init__(self, fileobj, compresslevel=6, chunk_size=GZIP_CHUNK_SIZE):
+        self.fileobj = fileobj
+        self.compresslevel = compresslevel
+        self.chunk_size = chunk_size
+        self.workers = os.cpu_count() or 1
+        self._executor = ThreadPoolExecutor(max_workers=self.workers)
+        self._pending = deque()
+        self._buffer = bytearray()
+    
+    def write(self, data):
+        self._buffer += data
+        while len(self._buffer) >= self.chunk_size:
+            self._submit(bytes(self._buffer[:self.chunk_size]))
+            del self._buffer[:self.chunk_size]
+        return len(data)
+    
+    def _submit(self, chunk):
+        # Keep at most two chunks per worker in flight to bound memory
+        if len(self._pending) >= 2 * self.workers:
+            self.fileobj.write(self._pending.popleft().result())
+        self._pending.append(
+            self._executor.submit(gzip.compress, chunk, self.compresslevel)
+        )
+    
+    def close(self):
+        try:
+            if self._buffer:
+                self._submit(bytes(self._buffer))
+                self._buffer.clear()
+            while self._pending:
+                self.fileobj.write(self._pending.popleft().result())
+        finally:
+            self._executor.shutdown()
+    
+    def __enter__(self):
+        return self
+    
+    def __exit__(self, exc_type, exc, tb):
+        if exc_type is None:
+            self.close()
+        else:
+            self._executor.shutdown()
+
+def _expand_entries(entries):
+    """Expand directory entries into one (path, arcname) pair per file"""
+    files = []
+    for path, arcname in entries:
+        if not path.is_dir():
+            files.append((path, arcname))
+            continue
+        for root, dirs, names in os.walk(path):
+            dirs.sort()
+            relative = Path(root).relative_to(path)
+            for filename in sorted(names):
+                files.append((Path(root) / filename,
+                              (Path(arcname) / relative / filename).as_posix()))
+    return files
+
+def _sha256(path):
+    """Hash a file's contents with SHA-256"""
+    with open(path, "rb") as f:
+        # file_digest (Python 3.11+) hashes in C without the GIL and without
+        # copying each chunk through a Python bytes object
+        if hasattr(hashlib, "file_digest"):
+            return hashlib.file_digest(f, "sha256").hexdigest()
+        digest = hashlib.sha256()
+        for chunk in iter(lambda: f.read(1024 * 1024), b""):
+            digest.update(chunk)
+        return digest.hexdigest()
+
+def _tar_bufsize(path):
+    """Pick a tarfile buffer size aligned to the filesystem block size"""
+    try:
+        block_size = os.statvfs(path).f_bsize
+    except (AttributeError, OSError):
+        # os.statvfs is not available on Windows
+        return MIN_TAR_BUFSIZE
+    return min(max(block_size, MIN_TAR_BUFSIZE), MAX_TAR_BUFSIZE)
+
+def _raw_fd(fileobj):
+    """Return the fd of a plain OS file or pipe object, or None"""
+    # Wrappers such as GzipFile also report the fd of the file underneath,
+    # so only trust objects that are (or directly buffer) an io.FileIO
+    raw = getattr(fileobj, "raw", fileobj)
+    if isinstance(raw, io.FileIO):
+        return raw.fileno()
+    return None
+
 class HeliosBackup:
-    def __init__(self, workspace_path):
+    def __init__(self, workspace_path, compression="auto"):
         self.workspace_path = Path(workspace_path)
         self.backup_dir = self.workspace_path / "backups"
         self.backup_dir.mkdir(exist_ok=True)
+        self.bufsize = _tar_bufsize(self.backup_dir)
+        
+        # zstd is several times faster than gzip at a comparable ratio, so
+        # prefer it whenever the module or the CLI is around
+        if compression == "auto":
+            compression = "zstd" if _zstd_available() else "gzip"
+        elif compression == "zstd" and not _zstd_available():
+            raise RuntimeError("zstd compression requires the zstandard package or the zstd binary")
+        self.compression = compression
     
-    def create_backup(self, name=None):
-        """Create a complete backup"""
+    def create_backup(self, name=None, incremental=False):
+        """Create a backup
+        
+        An incremental backup only archives files whose size or mtime
+        changed since the previous backup and records that backup as its
+        parent. Every FULL_BACKUP_INTERVAL-th backup is a full one.
+        """
+        now = datetime.now()
         if not name:
-            name = f"helios_backup_{datetime.now().strftime('%Y%m%d_%H%M%S')}"
+            name = f"helios_backup_{now.strftime('%Y%m%d_%H%M%S')}"
         
-        backup_path = self.backup_dir / f"{name}.tar.gz"
+        backup_path = self.backup_dir / f"{name}{ARCHIVE_SUFFIXES[self.compression]}"
         
         print(f"Creating backup: {backup_path}")
         
-        with tarfile.open(backup_path, "w:gz") as tar:
-            # Backup configurations
-            self._backup_configs(tar)
-            
-            # Backup extension source (compiled)
-            self._backup_extension(tar)
-            
-            # Backup server code
-            self._backup_server(tar)
-            
-            # Create manifest
-            self._create_manifest(tar, name)
+        # Collect (path, arcname) pairs up front so the archive can be
+        # written in one pass, whichever compressor ends up being used
+        entries = []
+        entries.extend(self._backup_configs())
+        entries.extend(self._backup_extension())
+        entries.extend(self._backup_server())
+        entries = _expand_entries(entries)
+        artifacts = _expand_entries(self._backup_artifacts())
+        
+        previous_index = self._read_index()
+        file_states = self._file_states(entries + artifacts,
+                                        previous_index["files"] if previous_index else {})
+        
+        index = self._incremental_base(previous_index) if incremental else None
+        if index is not None:
+            previous = index["files"]
+            entries = [(path, arcname) for path, arcname in entries
+                       if self._changed(previous.get(arcname), file_states[arcname])]
+            artifacts = [(path, arcname) for path, arcname in artifacts
+                         if self._changed(previous.get(arcname), file_states[arcname])]
+            parent = index["backup_name"]
+            chain_length = index["chain_length"] + 1
+            print(f"Incremental backup of {len(entries) + len(artifacts)} changed files "
+                  f"(parent: {parent})")
+        else:
+            parent = None
+            chain_length = 0
+        
+        artifacts_path = self._artifacts_path(backup_path)
+        manifest = self._create_manifest(name, now, artifacts_path.name if artifacts else None,
+                                         parent)
+        manifest["files"] = {arcname: file_states[arcname][2]
+                             for _, arcname in entries + artifacts}
+        
+        compressor = _find_compressor(self.compression)
+        if compressor:
+            # Let the native compressor do the CPU-bound work; Python only
+            # produces the uncompressed tar stream on its stdin
+            try:
+                with open(backup_path, "wb") as out:
+                    proc = subprocess.Popen(compressor, stdin=subprocess.PIPE, stdout=out)
+                    try:
+                        with _BackupTarFile.open(fileobj=proc.stdin, mode="w|",
+                                                 bufsize=self.bufsize,
+                                                 copybufsize=self.bufsize) as tar:
+                            self._write_entries(tar, entries, manifest, now)
+                    finally:
+                        proc.stdin.close()
+                        returncode = proc.wait()
+                if returncode != 0:
+                    raise RuntimeError(f"{compressor[0]} exited with status {returncode}")
+            except BaseException:
+                # A failed or interrupted write must not leave a truncated
+                # archive that list_backups and restore would pick up
+                backup_path.unlink(missing_ok=True)
+                self._manifest_path(backup_path).unlink(missing_ok=True)
+                raise
+        elif self.compression == "zstd":
+            # zstandard compresses on its own worker threads
+            cctx = zstd.ZstdCompressor(level=3, threads=-1)
+            with open(backup_path, "wb") as f, \
+                    cctx.stream_writer(f) as out, \
+                    _BackupTarFile.open(fileobj=out, mode="w|", bufsize=self.bufsize,
+                                        copybufsize=self.bufsize) as tar:
+                self._write_entries(tar, entries, manifest, now)
+        else:
+            # Stream mode skips the seekable-file bookkeeping of "w:gz", and
+            # compression is spread across cores in fixed-size gzip members
+            with open(backup_path, "wb") as f, \
+                    _ParallelGzipWriter(f) as out, \
+                    _BackupTarFile.open(fileobj=out, mode="w|", bufsize=self.bufsize,
+                                        copybufsize=self.bufsize) as tar:
+                self._write_entries(tar, entries, manifest, now)
+        
+        if artifacts:
+            # Compiled output is mostly minified and barely compresses, so
+            # store it uncompressed beside the archive instead of spending
+            # compressor time on it
+            with open(artifacts_path, "wb") as f, \
+                    _BackupTarFile.open(fileobj=f, mode="w|", bufsize=self.bufsize,
+                                        copybufsize=self.bufsize) as tar:
+                for file_path, arcname in artifacts:
+                    tar.add(file_path, arcname=arcname)
+        
+        # Keep a copy of the manifest next to the archive so listing
+        # backups never has to decompress anything
+        self._manifest_path(backup_path).write_text(json.dumps(manifest, indent=2))
+        
+        self._write_index(name, file_states, chain_length)
         
         print(f"✅ Backup created: {backup_path}")
         return backup_path
     
-    def _backup_configs(self, tar):
-        """Backup configuration files"""
+    def _file_states(self, files, previous):
+        """Return [size, mtime_ns, sha256] for each arcname
+        
+        Digests are reused from the previous index when size and mtime are
+        unchanged; the rest are hashed in parallel.
+        """
+        states = {}
+        to_hash = []
+        for path, arcname in files:
+            stat = path.lstat()
+            state = [stat.st_size, stat.st_mtime_ns]
+            known = previous.get(arcname)
+            if known and known[:2] == state and self._digest(known):
+                state.append(known[2])
+            elif path.is_file():
+                to_hash.append((path, arcname))
+            else:
+                state.append(None)
+            states[arcname] = state
+        
+        if to_hash:
+            # hashlib releases the GIL while digesting, so threads scale
+            with ThreadPoolExecutor(max_workers=os.cpu_count()) as executor:
+                digests = executor.map(_sha256, [path for path, _ in to_hash])
+                for (_, arcname), digest in zip(to_hash, digests):
+                    states[arcname].append(digest)
+        
+        return states
+    
+    def _changed(self, previous, state):
+        """Check whether a file differs from its state in the previous index"""
+        if previous is None:
+            return True
+        # Compare digests so files that were only touched are skipped
+        if self._digest(previous) and state[2]:
+            return previous[2] != state[2]
+        return previous[:2] != state[:2]
+    
+    def _digest(self, state):
+        """Return the digest from an index entry, if it has one"""
+        if state and len(state) > 2:
+            return state[2]
+        return None
+    
+    def _read_index(self):
+        """Read the file index written by the last backup, if any"""
+        index_path = self.backup_dir / INDEX_FILE
+        if not index_path.exists():
+            return None
+        return _loads(index_path.read_bytes())
+    
+    def _incremental_base(self, index):
+        """Return the index if an incremental backup can build on it"""
+        if index is None or index["chain_length"] + 1 >= FULL_BACKUP_INTERVAL:
+            return None
+        
+        # The parent must still exist for the chain to be restorable
+        if self._find_backup(index["backup_name"]) is None:
+            return None
+        
+        return index
+    
+    def _write_index(self, name, file_states, chain_length):
+        """Record the state of every file as of the backup just written"""
+        index = {
+            "backup_name": name,
+            "chain_length": chain_length,
+            "files": file_states
+        }
+        (self.backup_dir / INDEX_FILE).write_text(json.dumps(index))
+    
+    def _write_entries(self, tar, entries, manifest, created_at):
+        """Write collected entries and the manifest into an open archive"""
+        # Write the manifest straight from memory, no temp file needed. It
+        # goes first so readers can stop after the first header.
+        data = json.dumps(manifest, indent=2).encode()
+        tarinfo = tarfile.TarInfo("manifest.json")
+        tarinfo.size = len(data)
+        tarinfo.mtime = int(created_at.timestamp())
+        tarinfo.mode = 0o644
+        tar.addfile(tarinfo, io.BytesIO(data))
+        
+        for file_path, arcname in entries:
+            tar.add(file_path, arcname=arcname)
+    
+    def _backup_configs(self):
+        """Collect configuration files"""
         config_files = [
             ".vscode/settings.json",
             ".vscode/launch.json", 
@@ -55,34 +479,43 @@ class HeliosBackup:
             "server/pyproject.toml"
         ]
         
+        entries = []
         for config_file in config_files:
             file_path = self.workspace_path / config_file
             if file_path.exists():
-                tar.add(file_path, arcname=f"configs/{config_file}")
+                entries.append((file_path, f"configs/{config_file}"))
+        
+        return entries
     
-    def _backup_extension(self, tar):
-        """Backup extension files"""
+    def _backup_extension(self):
+        """Collect extension files"""
         extension_dir = self.workspace_path / "extension"
+        entries = []
         
         # Backup source
         src_dir = extension_dir / "src"
         if src_dir.exists():
-            tar.add(src_dir, arcname="extension/src")
-        
-        # Backup compiled output
-        out_dir = extension_dir / "out"
-        if out_dir.exists():
-            tar.add(out_dir, arcname="extension/out")
+            entries.append((src_dir, "extension/src"))
         
         # Backup package files
         for file in ["package.json", "tsconfig.json", ".eslintrc.json"]:
             file_path = extension_dir / file
             if file_path.exists():
-                tar.add(file_path, arcname=f"extension/{file}")
+                entries.append((file_path, f"extension/{file}"))
+        
+        return entries
+    
+    def _backup_artifacts(self):
+        """Collect compiled extension output, archived without compression"""
+        out_dir = self.workspace_path / "extension" / "out"
+        if out_dir.exists():
+            return [(out_dir, "extension/out")]
+        return []
     
-    def _backup_server(self, tar):
-        """Backup server files"""
+    def _backup_server(self):
+        """Collect server files"""
         server_dir = self.workspace_path / "server"
+        entries = []
         
         # Backup Python source
         python_files = [
@@ -93,19 +526,21 @@ class HeliosBackup:
         for py_file in python_files:
             file_path = server_dir / py_file
             if file_path.exists():
-                tar.add(file_path, arcname=f"server/{py_file}")
+                entries.append((file_path, f"server/{py_file}"))
         
         # Backup requirements and config
         for file in ["requirements.txt", "pyproject.toml", "Dockerfile"]:
             file_path = server_dir / file
             if file_path.exists():
-                tar.add(file_path, arcname=f"server/{file}")
+                entries.append((file_path, f"server/{file}"))
+        
+        return entries
     
-    def _create_manifest(self, tar, name):
+    def _create_manifest(self, name, created_at, artifacts=None, parent=None):
         """Create backup manifest"""
         manifest = {
             "backup_name": name,
-            "created_at": datetime.now().isoformat(),
+            "created_at": created_at.isoformat(),
             "workspace_path": str(self.workspace_path),
             "helios_version": "0.1.0",
             "contents": {
@@ -113,36 +548,124 @@ class HeliosBackup:
                 "extension_source": True,
                 "extension_compiled": True,
                 "server_source": True
-            }
+            },
+            "artifacts": artifacts,
+            "mode": "incremental" if parent else "full",
+            "parent": parent
         }
         
-        manifest_path = self.backup_dir / "manifest.json"
-        with open(manifest_path, 'w') as f:
-            json.dump(manifest, f, indent=2)
+        return manifest
+    
+    def _backup_stem(self, backup_file):
+        """Return a backup archive's file name without its suffix"""
+        name = backup_file.name
+        for suffix in ARCHIVE_SUFFIXES.values():
+            if name.endswith(suffix):
+                return name[:-len(suffix)]
+        return name
+    
+    def _manifest_path(self, backup_file):
+        """Return the sidecar manifest path for a backup archive"""
+        return backup_file.with_name(f"{self._backup_stem(backup_file)}.manifest.json")
+    
+    def _artifacts_path(self, backup_file):
+        """Return the uncompressed artifacts archive path for a backup archive"""
+        return backup_file.with_name(f"{self._backup_stem(backup_file)}{ARTIFACTS_SUFFIX}")
+    
+    def _find_backup(self, name):
+        """Return the archive for an exact backup name, or None"""
+        for suffix in ARCHIVE_SUFFIXES.values():
+            path = self.backup_dir / f"{name}{suffix}"
+            if path.exists():
+                return path
+        return None
+    
+    def _load_manifest(self, backup_file):
+        """Read a backup's manifest, preferring the sidecar copy"""
+        manifest_path = self._manifest_path(backup_file)
+        if manifest_path.exists():
+            return _loads(manifest_path.read_bytes())
         
-        tar.add(manifest_path, arcname="manifest.json")
-        manifest_path.unlink()  # Remove temp file
+        # Older backups only carry the manifest inside the archive
+        with self._open_archive(backup_file) as tar:
+            return _read_manifest(tar)
+    
+    def _backup_chain(self, backup_file):
+        """Return a backup and its incremental parents, oldest first"""
+        chain = [backup_file]
+        manifest = self._load_manifest(backup_file)
+        while manifest and manifest.get("parent"):
+            parent_file = self._find_backup(manifest["parent"])
+            if parent_file is None:
+                raise FileNotFoundError(f"Parent backup not found: {manifest['parent']}")
+            chain.append(parent_file)
+            manifest = self._load_manifest(parent_file)
+        return chain[::-1]
+    
+    def _backup_files(self, pattern="*"):
+        """Yield backup archives in any supported format matching a pattern"""
+        for suffix in ARCHIVE_SUFFIXES.values():
+            yield from self.backup_dir.glob(f"{pattern}{suffix}")
+    
+    @contextmanager
+    def _open_archive(self, backup_file):
+        """Open a backup archive of either format for reading"""
+        if backup_file.name.endswith(ARCHIVE_SUFFIXES["gzip"]):
+            # Keep "r:gz" here: the "r|gz" stream reader copies its buffer
+            # tail on every read, which is quadratic in the archive size
+            with tarfile.open(backup_file, "r:gz", copybufsize=self.bufsize) as tar:
+                yield tar
+        elif backup_file.name.endswith(ARTIFACTS_SUFFIX):
+            with tarfile.open(backup_file, "r:", copybufsize=self.bufsize) as tar:
+                yield tar
+        elif zstd is not None:
+            with open(backup_file, "rb") as f, \
+                    zstd.ZstdDecompressor().stream_reader(f) as reader, \
+                    tarfile.open(fileobj=reader, mode="r|", bufsize=self.bufsize,
+                                 copybufsize=self.bufsize) as tar:
+                yield tar
+        elif shutil.which("zstd"):
+            proc = subprocess.Popen([shutil.which("zstd"), "-dcq", str(backup_file)],
+                                    stdout=subprocess.PIPE)
+            try:
+                with tarfile.open(fileobj=proc.stdout, mode="r|", bufsize=self.bufsize,
+                                  copybufsize=self.bufsize) as tar:
+                    yield tar
+            finally:
+                proc.stdout.close()
+                proc.wait()
+        else:
+            raise RuntimeError(f"Reading {backup_file.name} requires the zstandard package "
+                               "or the zstd binary")
     
     def list_backups(self):
         """List available backups"""
         backups = []
         
-        for backup_file in self.backup_dir.glob("*.tar.gz"):
+        for backup_file in self._backup_files():
             try:
-                with tarfile.open(backup_file, "r:gz") as tar:
-                    if "manifest.json" in tar.getnames():
-                        manifest_file = tar.extractfile("manifest.json")
-                        manifest = json.load(manifest_file)
-                        backups.append({
-                            "file": backup_file.name,
-                            "name": manifest.get("backup_name", "Unknown"),
-                            "created_at": manifest.get("created_at", "Unknown"),
-                            "size": backup_file.stat().st_size
-                        })
+                manifest = self._load_manifest(backup_file)
+                if manifest is not None:
+                    stat = backup_file.stat()
+                    size = stat.st_size
+                    if manifest.get("artifacts"):
+                        try:
+                            size += self._artifacts_path(backup_file).stat().st_size
+                        except FileNotFoundError:
+                            pass
+                    backups.append({
+                        "file": backup_file.name,
+                        "name": manifest.get("backup_name", "Unknown"),
+                        "created_at": manifest.get("created_at", "Unknown"),
+                        "modified": stat.st_mtime,
+                        "size": size,
+                        "mode": manifest.get("mode", "full"),
+                        "parent": manifest.get("parent")
+                    })
             except Exception as e:
                 print(f"Warning: Could not read backup {backup_file}: {e}")
         
-        return sorted(backups, key=lambda x: x["created_at"], reverse=True)
+        return sorted(backups, key=lambda x: x["modified"], reverse=True)
     
     def restore_backup(self, backup_name, target_path=None):
         """Restore from backup"""
@@ -151,10 +674,10 @@ class HeliosBackup:
         else:
             target_path = Path(target_path)
         
-        backup_file = self.backup_dir / f"{backup_name}.tar.gz"
-        if not backup_file.exists():
+        backup_file = self._find_backup(backup_name)
+        if backup_file is None:
             # Try to find by partial name
-            matches = list(self.backup_dir.glob(f"*{backup_name}*.tar.gz"))
+            matches = list(self._backup_files(f"*{backup_name}*"))
             if matches:
                 backup_file = matches[0]
             else:
@@ -166,36 +689,71 @@ class HeliosBackup:
         # Create target directory
         target_path.mkdir(parents=True, exist_ok=True)
         
-        with tarfile.open(backup_file, "r:gz") as tar:
-            # Extract all files
-            tar.extractall(target_path)
+        # Incremental backups are applied on top of their parents, oldest
+        # first, so newer copies of a file overwrite older ones
+        for archive in self._backup_chain(backup_file):
+            self._extract(archive, target_path)
+            
+            # Compiled output lives in a separate uncompressed archive
+            artifacts_path = self._artifacts_path(archive)
+            if artifacts_path.exists():
+                self._extract(artifacts_path, target_path)
         
         print("✅ Backup restored successfully")
         
         # Show manifest info
         manifest_path = target_path / "manifest.json"
         if manifest_path.exists():
-            with open(manifest_path) as f:
-                manifest = json.load(f)
+            manifest = _loads(manifest_path.read_bytes())
             
             print(f"Restored backup: {manifest.get('backup_name', 'Unknown')}")
             print(f"Created: {manifest.get('created_at', 'Unknown')}")
             print(f"Original path: {manifest.get('workspace_path', 'Unknown')}")
     
+    def _extract(self, backup_file, target_path):
+        """Extract an archive, preferring the native tar binary"""
+        if not self._extract_native(backup_file, target_path):
+            with self._open_archive(backup_file) as tar:
+                # Extract all files
+                tar.extractall(target_path)
+    
+    def _extract_native(self, backup_file, target_path):
+        """Extract with the tar binary; return False to fall back to tarfile"""
+        command = _native_extract_command(backup_file, target_path)
+        if command is None:
+            return False
+        
+        try:
+            subprocess.run(command, check=True, capture_output=True)
+            return True
+        except (OSError, subprocess.CalledProcessError) as e:
+            print(f"Warning: native tar extraction failed, falling back to tarfile: {e}")
+            return False
+    
     def cleanup_old_backups(self, keep_count=5):
         """Remove old backups, keeping only the most recent ones"""
-        backups = self.list_backups()
+        # Archive mtimes order backups well enough; no need to open any
+        backups = sorted(self._backup_files(), key=lambda p: p.stat().st_mtime, reverse=True)
         
         if len(backups) <= keep_count:
             print(f"Only {len(backups)} backups found, nothing to clean up")
             return
         
-        to_remove = backups[keep_count:]
+        # Never remove a backup that a kept incremental still builds on
+        protected = set()
+        for backup_path in backups[:keep_count]:
+            try:
+                protected.update(self._backup_chain(backup_path))
+            except FileNotFoundError as e:
+                print(f"Warning: {backup_path.name} has a broken chain: {e}")
+        
+        to_remove = [path for path in backups[keep_count:] if path not in protected]
         
-        for backup in to_remove:
-            backup_path = self.backup_dir / backup["file"]
+        for backup_path in to_remove:
             backup_path.unlink()
-            print(f"Removed old backup: {backup['file']}")
+            self._manifest_path(backup_path).unlink(missing_ok=True)
+            self._artifacts_path(backup_path).unlink(missing_ok=True)
+            print(f"Removed old backup: {backup_path.name}")
         
         print(f"✅ Cleaned up {len(to_remove)} old backups")
 
@@ -209,6 +767,11 @@ def main():
     # Create backup
     create_parser = subparsers.add_parser("create", help="Create backup")
     create_parser.add_argument("--name", help="Backup name")
+    create_parser.add_argument("--incremental", action="store_true",
+                               help="Only archive files changed since the last backup")
+    create_parser.add_argument("--compression", choices=["auto", "zstd", "gzip"],
+                               default="auto",
+                               help="Compression format (default: zstd if available)")
     
     # List backups
     subparsers.add_parser("list", help="List backups")
@@ -229,10 +792,10 @@ def main():
         parser.print_help()
         return
     
-    backup_tool = HeliosBackup(args.workspace)
+    backup_tool = HeliosBackup(args.workspace, getattr(args, "compression", "auto"))
     
     if args.command == "create":
-        backup_tool.create_backup(args.name)
+        backup_tool.create_backup(args.name, args.incremental)
     
     elif args.command == "list":
         backups = backup_tool.list_backups()
@@ -244,6 +807,8 @@ def main():
                 print(f"{backup['name']}")
                 print(f"  File: {backup['file']}")
                 print(f"  Created: {backup['created_at']}")
+                if backup["mode"] == "incremental":
+                    print(f"  Incremental on: {backup['parent']}")
                 print(f"  Size: {size_mb:.1f} MB")
                 print()
         else:
@@ -7,21 +7,47 @@ import os
 import json
 import sys
 from pathlib import Path
-from typing import Dict, List, Any, Optional
+from typing import Dict, List, Any, Optional, Set
 import subprocess
+from collections import Counter
+
+from _compat import loads as _loads
+
+# Packages the inference server cannot start without
+REQUIRED_PACKAGES = ["fastapi", "ollama"]
+
+def _dir_names(path: Path) -> Optional[Set[str]]:
+    """List a directory's entry names in one scandir, or None if it is missing"""
+    # One getdents per directory instead of a stat() per file checked
+    try:
+        with os.scandir(path) as entries:
+            return {entry.name for entry in entries}
+    except (FileNotFoundError, NotADirectoryError):
+        return None
 
 class ConfigValidator:
-    def __init__(self):
+    def __init__(self, deep: bool = False):
         self.issues: List[Dict[str, str]] = []
+        self.severity_counts: Counter = Counter()
         self.fixes_applied: List[str] = []
+        # Import the dependencies in the venv interpreter instead of only
+        # looking for them in site-packages
+        self.deep = deep
+        self._ollama_list_result: Optional[subprocess.CompletedProcess] = None
+    
+    def _add_issue(self, issue: Dict[str, str]) -> None:
+        """Record an issue and keep the per-severity counts current"""
+        self.issues.append(issue)
+        self.severity_counts[issue["severity"]] += 1
     
     def validate_vscode_config(self, workspace_path: str) -> bool:
         """Validate VS Code workspace configuration"""
         vscode_dir = Path(workspace_path) / ".vscode"
+        vscode_names = _dir_names(vscode_dir)
         
         # Check if .vscode directory exists
-        if not vscode_dir.exists():
-            self.issues.append({
+        if vscode_names is None:
+            self._add_issue({
                 "type": "missing_directory",
                 "message": ".vscode directory not found",
                 "severity": "warning",
@@ -31,8 +57,8 @@ class ConfigValidator:
         
         # Check settings.json
         settings_file = vscode_dir / "settings.json"
-        if not settings_file.exists():
-            self.issues.append({
+        if "settings.json" not in vscode_names:
+            self._add_issue({
                 "type": "missing_file",
                 "message": "settings.json not found",
                 "severity": "info",
@@ -42,22 +68,20 @@ class ConfigValidator:
             self._validate_settings_json(settings_file)
         
         # Check launch.json
-        launch_file = vscode_dir / "launch.json"
-        if not launch_file.exists():
-            self.issues.append({
+        if "launch.json" not in vscode_names:
+            self._add_issue({
                 "type": "missing_file",
                 "message": "launch.json not found",
                 "severity": "info",
                 "fix": "Create default launch configuration"
             })
         
-        return len([issue for issue in self.issues if issue["severity"] == "error"]) == 0
+        return self.severity_counts["error"] == 0
     
     def _validate_settings_json(self, settings_file: Path) -> None:
         """Validate VS Code settings.json content"""
         try:
-            with open(settings_file) as f:
-                settings = json.load(f)
+            settings = _loads(settings_file.read_bytes())
             
             # Check Helios-specific settings
             helios_settings = {
@@ -68,7 +92,7 @@ class ConfigValidator:
             
             for key, default_value in helios_settings.items():
                 if key not in settings:
-                    self.issues.append({
+                    self._add_issue({
                         "type": "missing_setting",
                         "message": f"Missing Helios setting: {key}",
                         "severity": "info",
@@ -76,7 +100,7 @@ class ConfigValidator:
                     })
             
         except json.JSONDecodeError:
-            self.issues.append({
+            self._add_issue({
                 "type": "invalid_json",
                 "message": "settings.json contains invalid JSON",
                 "severity": "error",
@@ -86,10 +110,11 @@ class ConfigValidator:
     def validate_python_environment(self, server_path: str) -> bool:
         """Validate Python environment setup"""
         server_dir = Path(server_path)
+        server_names = _dir_names(server_dir)
         
         # Check if server directory exists
-        if not server_dir.exists():
-            self.issues.append({
+        if server_names is None:
+            self._add_issue({
                 "type": "missing_directory",
                 "message": "Server directory not found",
                 "severity": "error",
@@ -99,8 +124,9 @@ class ConfigValidator:
         
         # Check virtual environment
         venv_dir = server_dir / "venv"
-        if not venv_dir.exists():
-            self.issues.append({
+        has_venv = "venv" in server_names
+        if not has_venv:
+            self._add_issue({
                 "type": "missing_venv",
                 "message": "Python virtual environment not found",
                 "severity": "warning",
@@ -108,9 +134,8 @@ class ConfigValidator:
             })
         
         # Check requirements.txt
-        requirements_file = server_dir / "requirements.txt"
-        if not requirements_file.exists():
-            self.issues.append({
+        if "requirements.txt" not in server_names:
+            self._add_issue({
                 "type": "missing_file",
                 "message": "requirements.txt not found",
                 "severity": "error",
@@ -118,84 +143,106 @@ class ConfigValidator:
             })
         
         # Check if dependencies are installed
-        if venv_dir.exists():
-            python_path = venv_dir / "bin" / "python"
-            if not python_path.exists():
-                python_path = venv_dir / "Scripts" / "python.exe"  # Windows
-            
-            if python_path.exists():
-                try:
-                    result = subprocess.run([str(python_path), "-c", "import fastapi, ollama"],
-                                          capture_output=True, text=True)
-                    if result.returncode != 0:
-                        self.issues.append({
-                            "type": "missing_dependencies",
-                            "message": "Required Python packages not installed",
-                            "severity": "error",
-                            "fix": "Install dependencies: pip install -r requirements.txt"
-                        })
-                except Exception:
-                    self.issues.append({
-                        "type": "environment_error",
-                        "message": "Could not test Python environment",
-                        "severity": "warning",
-                        "fix": "Check virtual environment setup"
-                    })
+        if has_venv:
+            if self.deep:
+                self._check_venv_imports(venv_dir)
+            else:
+                self._check_venv_packages(venv_dir)
+        
+        return self.severity_counts["error"] == 0
+    
+    def _check_venv_packages(self, venv_dir: Path) -> None:
+        """Check that required packages are present in the venv's site-packages"""
+        # Looking at site-packages avoids starting a whole interpreter
+        site_packages = next(venv_dir.glob("lib/python*/site-packages"), None)
+        if site_packages is None:
+            site_packages = venv_dir / "Lib" / "site-packages"  # Windows
+        
+        installed = _dir_names(site_packages) or set()
+        if not all(package in installed for package in REQUIRED_PACKAGES):
+            self._add_issue({
+                "type": "missing_dependencies",
+                "message": "Required Python packages not installed",
+                "severity": "error",
+                "fix": "Install dependencies: pip install -r requirements.txt"
+            })
+    
+    def _check_venv_imports(self, venv_dir: Path) -> None:
+        """Check that required packages import in the venv's interpreter"""
+        python_path = venv_dir / "bin" / "python"
+        if not python_path.exists():
+            python_path = venv_dir / "Scripts" / "python.exe"  # Windows
         
-        return len([issue for issue in self.issues if issue["severity"] == "error"]) == 0
+        if python_path.exists():
+            try:
+                result = subprocess.run([str(python_path), "-c",
+                                         f"import {', '.join(REQUIRED_PACKAGES)}"],
+                                      capture_output=True, text=True)
+                if result.returncode != 0:
+                    self._add_issue({
+                        "type": "missing_dependencies",
+                        "message": "Required Python packages not installed",
+                        "severity": "error",
+                        "fix": "Install dependencies: pip install -r requirements.txt"
+                    })
+            except Exception:
+                self._add_issue({
+                    "type": "environment_error",
+                    "message": "Could not test Python environment",
+                    "severity": "warning",
+                    "fix": "Check virtual environment setup"
+                })
     
     def validate_ollama_installation(self) -> bool:
         """Validate Ollama installation and model availability"""
-        # Check if Ollama is installed
+        # A single `ollama list` tells us both whether the CLI is installed
+        # and which models it has
         try:
-            result = subprocess.run(["ollama", "version"], 
-                                  capture_output=True, text=True)
-            if result.returncode != 0:
-                self.issues.append({
-                    "type": "missing_ollama",
-                    "message": "Ollama is not installed or not in PATH",
-                    "severity": "error",
-                    "fix": "Install Ollama from https://ollama.com"
-                })
-                return False
+            result = self._ollama_list()
         except FileNotFoundError:
-            self.issues.append({
+            self._add_issue({
                 "type": "missing_ollama",
                 "message": "Ollama command not found",
                 "severity": "error",
                 "fix": "Install Ollama and ensure it's in PATH"
             })
             return False
+        except Exception:
+            result = None
         
         # Check available models
-        try:
-            result = subprocess.run(["ollama", "list"], 
-                                  capture_output=True, text=True)
-            if "codellama" not in result.stdout:
-                self.issues.append({
-                    "type": "missing_model",
-                    "message": "No CodeLlama models found",
-                    "severity": "warning",
-                    "fix": "Install a model: ollama pull codellama:7b-code"
-                })
-        except Exception:
-            self.issues.append({
+        if result is None or result.returncode != 0:
+            self._add_issue({
                 "type": "ollama_error",
                 "message": "Could not check available models",
                 "severity": "warning",
                 "fix": "Ensure Ollama service is running"
             })
+        elif "codellama" not in result.stdout:
+            self._add_issue({
+                "type": "missing_model",
+                "message": "No CodeLlama models found",
+                "severity": "warning",
+                "fix": "Install a model: ollama pull codellama:7b-code"
+            })
         
         return True
     
+    def _ollama_list(self) -> subprocess.CompletedProcess:
+        """Run `ollama list` once per validator and reuse the result"""
+        if self._ollama_list_result is None:
+            self._ollama_list_result = subprocess.run(["ollama", "list"],
+                                                      capture_output=True, text=True,
+                                                      timeout=5)
+        return self._ollama_list_result
+    
     def validate_extension_setup(self, extension_path: str) -> bool:
         """Validate VS Code extension setup"""
-        extension_dir = Path(extension_path)
+        extension_names = _dir_names(Path(extension_path)) or set()
         
         # Check package.json
-        package_json = extension_dir / "package.json"
-        if not package_json.exists():
-            self.issues.append({
+        if "package.json" not in extension_names:
+            self._add_issue({
                 "type": "missing_file",
                 "message": "Extension package.json not found",
                 "severity": "error",
@@ -204,9 +251,8 @@ class ConfigValidator:
             return False
         
         # Check node_modules
-        node_modules = extension_dir / "node_modules"
-        if not node_modules.exists():
-            self.issues.append({
+        if "node_modules" not in extension_names:
+            self._add_issue({
                 "type": "missing_dependencies",
                 "message": "Node.js dependencies not installed",
                 "severity": "error",
@@ -214,40 +260,61 @@ class ConfigValidator:
             })
         
         # Check compiled output
-        out_dir = extension_dir / "out"
-        if not out_dir.exists():
-            self.issues.append({
+        if "out" not in extension_names:
+            self._add_issue({
                 "type": "not_compiled",
                 "message": "Extension not compiled",
                 "severity": "warning",
                 "fix": "Run: npm run compile"
             })
         
-        return len([issue for issue in self.issues if issue["severity"] == "error"]) == 0
+        return self.severity_counts["error"] == 0
     
-    def run_full_validation(self, workspace_path: str) -> Dict[str, Any]:
-        """Run complete validation suite"""
+    def run_full_validation(self, workspace_path: str, fail_fast: bool = True) -> Dict[str, Any]:
+        """Run complete validation suite
+        
+        With fail_fast, checks stop at the first error-severity issue and the
+        remaining components are reported as skipped (None).
+        """
         self.issues = []
+        self.severity_counts = Counter()
         self.fixes_applied = []
         
-        results = {
-            "vscode_config": self.validate_vscode_config(workspace_path),
-            "python_environment": self.validate_python_environment(
+        # Cheapest checks first so the Ollama subprocess is the one skipped
+        checks = [
+            ("vscode_config", lambda: self.validate_vscode_config(workspace_path)),
+            ("python_environment", lambda: self.validate_python_environment(
                 os.path.join(workspace_path, "server")
-            ),
-            "ollama_installation": self.validate_ollama_installation(),
-            "extension_setup": self.validate_extension_setup(
+            )),
+            ("extension_setup", lambda: self.validate_extension_setup(
                 os.path.join(workspace_path, "extension")
-            )
+            )),
+            ("ollama_installation", self.validate_ollama_installation)
+        ]
+        
+        outcomes: Dict[str, Optional[bool]] = {}
+        for component, check in checks:
+            if fail_fast and self.severity_counts["error"]:
+                outcomes[component] = None
+            else:
+                outcomes[component] = check()
+        
+        results: Dict[str, Any] = {
+            component: outcomes[component]
+            for component in ["vscode_config", "python_environment",
+                              "ollama_installation", "extension_setup"]
         }
         
         results["overall_status"] = all(results.values())
         results["issues"] = self.issues
-        results["issues_by_severity"] = {
-            "error": [i for i in self.issues if i["severity"] == "error"],
-            "warning": [i for i in self.issues if i["severity"] == "warning"],
-            "info": [i for i in self.issues if i["severity"] == "info"]
+        issues_by_severity: Dict[str, List[Dict[str, str]]] = {
+            "error": [],
+            "warning": [],
+            "info": []
         }
+        for issue in self.issues:
+            issues_by_severity[issue["severity"]].append(issue)
+        results["issues_by_severity"] = issues_by_severity
         
         return results
     
@@ -278,39 +345,46 @@ class ConfigValidator:
     
     def generate_report(self, results: Dict[str, Any]) -> str:
         """Generate a human-readable validation report"""
-        report = "Helios Configuration Validation Report\n"
-        report += "=" * 50 + "\n\n"
+        parts: List[str] = [
+            "Helios Configuration Validation Report\n",
+            "=" * 50 + "\n\n"
+        ]
         
         # Overall status
         status_icon = "✅" if results["overall_status"] else "❌"
-        report += f"Overall Status: {status_icon} {'PASS' if results['overall_status'] else 'FAIL'}\n\n"
+        parts.append(f"Overall Status: {status_icon} {'PASS' if results['overall_status'] else 'FAIL'}\n\n")
         
         # Component status
-        report += "Component Status:\n"
+        parts.append("Component Status:\n")
         for component, status in results.items():
             if component not in ["overall_status", "issues", "issues_by_severity"]:
-                icon = "✅" if status else "❌"
-                report += f"  {icon} {component.replace('_', ' ').title()}: {'OK' if status else 'Issues Found'}\n"
+                if status is None:
+                    icon, label = "⏭️", "Skipped"
+                else:
+                    icon, label = ("✅", "OK") if status else ("❌", "Issues Found")
+                parts.append(f"  {icon} {component.replace('_', ' ').title()}: {label}\n")
         
         # Issues by severity
-        report += "\nIssues Found:\n"
+        parts.append("\nIssues Found:\n")
         for severity in ["error", "warning", "info"]:
             issues = results["issues_by_severity"][severity]
             if issues:
-                report += f"\n{severity.upper()}S ({len(issues)}):\n"
+                parts.append(f"\n{severity.upper()}S ({len(issues)}):\n")
                 for issue in issues:
-                    report += f"  • {issue['message']}\n"
-                    report += f"    Fix: {issue['fix']}\n"
+                    parts.append(f"  • {issue['message']}\n")
+                    parts.append(f"    Fix: {issue['fix']}\n")
         
         if not any(results["issues_by_severity"].values()):
-            report += "  No issues found! 🎉\n"
+            parts.append("  No issues found! 🎉\n")
         
-        return report
+        return "".join(parts)
 
 def main():
     if len(sys.argv) < 2:
         print("Usage: python config_validator.py <workspace_path>")
         print("Example: python config_validator.py /path/to/helios")
+        print("Options: --fix (apply automatic fixes), --deep (import-test the server venv),")
+        print("         --no-fail-fast (keep checking after the first error)")
         return
     
     workspace_path = sys.argv[1]
@@ -319,10 +393,11 @@ def main():
         print(f"Error: Workspace path '{workspace_path}' does not exist")
         return
     
-    validator = ConfigValidator()
+    validator = ConfigValidator(deep="--deep" in sys.argv)
     
     print("🔍 Running Helios configuration validation...")
-    results = validator.run_full_validation(workspace_path)
+    results = validator.run_full_validation(workspace_path,
+                                            fail_fast="--no-fail-fast" not in sys.argv)
     
     # Apply automatic fixes if requested
     if "--fix" in sys.argv:
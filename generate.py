@@ -6,29 +6,50 @@ A utility for generating boilerplate code, configuration files, and project scaf
 for Helios development. Helps maintain consistency and speeds up development.
 """
 
-import os
-import json
+import re
 import argparse
+import functools
 from pathlib import Path
-from typing import Dict, List, Optional, Any
-from datetime import datetime
-import subprocess
+from typing import Dict, List, Optional, Set, Tuple, Any
 
+# Start of the FastAPI app construction in main.py, and the parens that follow
+_APP_CALL_RE = re.compile(r'^app\s*=\s*FastAPI\s*\(', re.M)
+_PAREN_RE = re.compile(r'[()]')
 
-class HeliosCodeGenerator:
-    """Main code generator for Helios project scaffolding."""
-    
-    def __init__(self, project_root: str = "."):
-        self.project_root = Path(project_root)
-        self.templates_dir = self.project_root / "templates"
-        
-    def generate_extension_command(self, command_name: str, title: str, category: str = "Helios") -> None:
-        """Generate a new VS Code command for the extension."""
-        # Generate command implementation
-        command_file = f"""import * as vscode from 'vscode';
+from _compat import dumps_indented as _dumps_indented, loads as _loads
+
+
+@functools.lru_cache(maxsize=1024)
+def _to_camel_case(snake_str: str) -> str:
+    """Convert snake_case to camelCase."""
+    components = snake_str.split('_')
+    return components[0] + ''.join(word.capitalize() for word in components[1:])
+
+
+@functools.lru_cache(maxsize=1024)
+def _to_pascal_case(snake_str: str) -> str:
+    """Convert snake_case to PascalCase."""
+    return ''.join(word.capitalize() for word in snake_str.split('_'))
+
+
+@functools.lru_cache(maxsize=1024)
+def _name_forms(snake_str: str) -> Tuple[str, str, str]:
+    """Return the PascalCase, dashed and title-case forms of a snake_case name."""
+    return (
+        _to_pascal_case(snake_str),
+        snake_str.replace('_', '-'),
+        snake_str.replace('_', ' ').title(),
+    )
+
+
+# File templates, filled in with str.format_map. The literal text is built
+# once at import rather than on every generate_* call.
+
+# VS Code command implementation
+_COMMAND_TEMPLATE = """import * as vscode from 'vscode';
 import {{ logger }} from './logger';
 
-export async function {self._to_camel_case(command_name)}(): Promise<void> {{
+export async function {camel}(): Promise<void> {{
     try {{
         logger.info('Executing command: {command_name}');
         
@@ -41,21 +62,9 @@ export async function {self._to_camel_case(command_name)}(): Promise<void> {{
     }}
 }}
 """
-        
-        command_path = self.project_root / "extension" / "src" / "commands" / f"{command_name.replace('-', '_')}.ts"
-        command_path.parent.mkdir(exist_ok=True)
-        
-        with open(command_path, 'w') as f:
-            f.write(command_file)
-        
-        print(f"Generated command file: {command_path}")
-        
-        # Update package.json
-        self._add_command_to_package_json(command_name, title, category)
-        
-    def generate_server_endpoint(self, endpoint_name: str, method: str = "POST") -> None:
-        """Generate a new FastAPI endpoint for the server."""
-        endpoint_file = f"""from fastapi import APIRouter, HTTPException, Depends
+
+# FastAPI endpoint module
+_ENDPOINT_TEMPLATE = """from fastapi import APIRouter, HTTPException, Depends
 from pydantic import BaseModel
 from typing import Optional
 import logging
@@ -67,25 +76,25 @@ logger = logging.getLogger(__name__)
 router = APIRouter()
 
 
-class {self._to_pascal_case(endpoint_name)}Request(BaseModel):
+class {pascal}Request(BaseModel):
     \"\"\"Request model for {endpoint_name} endpoint.\"\"\"
     # TODO: Add request fields
     data: str
 
 
-class {self._to_pascal_case(endpoint_name)}Response(BaseResponse):
+class {pascal}Response(BaseResponse):
     \"\"\"Response model for {endpoint_name} endpoint.\"\"\"
     # TODO: Add response fields
     result: str
 
 
-@router.{method.lower()}("/{endpoint_name.replace('_', '-')}")
+@router.{method}("/{dashed}")
 async def {endpoint_name}(
-    request: {self._to_pascal_case(endpoint_name)}Request,
+    request: {pascal}Request,
     # current_user = Depends(get_current_user)  # Uncomment if auth needed
-) -> {self._to_pascal_case(endpoint_name)}Response:
+) -> {pascal}Response:
     \"\"\"
-    {endpoint_name.replace('_', ' ').title()} endpoint.
+    {pretty} endpoint.
     
     Args:
         request: The request data
@@ -102,9 +111,9 @@ async def {endpoint_name}(
         # TODO: Implement endpoint logic
         result = f"Processed: {{request.data}}"
         
-        return {self._to_pascal_case(endpoint_name)}Response(
+        return {pascal}Response(
             success=True,
-            message="{endpoint_name.replace('_', ' ').title()} completed successfully",
+            message="{pretty} completed successfully",
             result=result
         )
         
@@ -112,25 +121,12 @@ async def {endpoint_name}(
         logger.error(f"{endpoint_name} endpoint error: {{e}}")
         raise HTTPException(
             status_code=500,
-            detail=f"{endpoint_name.replace('_', ' ').title()} failed: {{str(e)}}"
+            detail=f"{pretty} failed: {{str(e)}}"
         )
 """
-        
-        endpoint_path = self.project_root / "server" / "endpoints" / f"{endpoint_name}.py"
-        endpoint_path.parent.mkdir(exist_ok=True)
-        
-        with open(endpoint_path, 'w') as f:
-            f.write(endpoint_file)
-        
-        print(f"Generated endpoint file: {endpoint_path}")
-        
-        # Update main.py to include the router
-        self._add_router_to_main(endpoint_name)
-    
-    def generate_test_file(self, module_name: str, test_type: str = "unit") -> None:
-        """Generate a test file for a module."""
-        if test_type == "unit":
-            test_file = f"""import pytest
+
+# Unit test module
+_UNIT_TEST_TEMPLATE = """import pytest
 import asyncio
 from unittest.mock import Mock, patch, AsyncMock
 
@@ -138,7 +134,7 @@ from unittest.mock import Mock, patch, AsyncMock
 # from {module_name} import YourClass
 
 
-class Test{self._to_pascal_case(module_name)}:
+class Test{pascal}:
     \"\"\"Unit tests for {module_name} module.\"\"\"
     
     def setup_method(self):
@@ -175,8 +171,9 @@ class Test{self._to_pascal_case(module_name)}:
         mock_dependency.return_value = "mocked_result"
         assert True  # Replace with actual test
 """
-        elif test_type == "integration":
-            test_file = f"""import pytest
+
+# Integration test module
+_INTEGRATION_TEST_TEMPLATE = """import pytest
 import asyncio
 import httpx
 from fastapi.testclient import TestClient
@@ -185,7 +182,7 @@ from fastapi.testclient import TestClient
 from main import app
 
 
-class TestIntegration{self._to_pascal_case(module_name)}:
+class TestIntegration{pascal}:
     \"\"\"Integration tests for {module_name}.\"\"\"
     
     def setup_method(self):
@@ -199,7 +196,7 @@ class TestIntegration{self._to_pascal_case(module_name)}:
     def test_{module_name}_endpoint_success(self):
         \"\"\"Test successful API call to {module_name} endpoint.\"\"\"
         response = self.client.post(
-            f"/{module_name.replace('_', '-')}",
+            f"/{dashed}",
             json={{"data": "test_input"}}
         )
         assert response.status_code == 200
@@ -209,7 +206,7 @@ class TestIntegration{self._to_pascal_case(module_name)}:
     def test_{module_name}_endpoint_error_handling(self):
         \"\"\"Test error handling in {module_name} endpoint.\"\"\"
         response = self.client.post(
-            f"/{module_name.replace('_', '-')}",
+            f"/{dashed}",
             json={{"invalid": "data"}}
         )
         assert response.status_code == 422  # Validation error
@@ -219,26 +216,16 @@ class TestIntegration{self._to_pascal_case(module_name)}:
         \"\"\"Test {module_name} with async HTTP client.\"\"\"
         async with httpx.AsyncClient(app=app, base_url="http://test") as client:
             response = await client.post(
-                f"/{module_name.replace('_', '-')}",
+                f"/{dashed}",
                 json={{"data": "async_test"}}
             )
             assert response.status_code == 200
 """
-        
-        test_dir = "tests/unit" if test_type == "unit" else "tests/integration"
-        test_path = self.project_root / test_dir / f"test_{module_name}.py"
-        test_path.parent.mkdir(parents=True, exist_ok=True)
-        
-        with open(test_path, 'w') as f:
-            f.write(test_file)
-        
-        print(f"Generated {test_type} test file: {test_path}")
-    
-    def generate_config_schema(self, config_name: str) -> None:
-        """Generate a configuration schema file."""
-        schema_file = f"""{{
+
+# Configuration JSON schema
+_CONFIG_SCHEMA_TEMPLATE = """{{
   "$schema": "http://json-schema.org/draft-07/schema#",
-  "title": "{config_name.replace('_', ' ').title()} Configuration",
+  "title": "{pretty} Configuration",
   "description": "Configuration schema for {config_name}",
   "type": "object",
   "properties": {{
@@ -249,7 +236,7 @@ class TestIntegration{self._to_pascal_case(module_name)}:
     }},
     "settings": {{
       "type": "object",
-      "description": "{config_name.replace('_', ' ').title()} specific settings",
+      "description": "{pretty} specific settings",
       "properties": {{
         "example_setting": {{
           "type": "string",
@@ -264,19 +251,9 @@ class TestIntegration{self._to_pascal_case(module_name)}:
   "additionalProperties": false
 }}
 """
-        
-        schema_path = self.project_root / "schemas" / f"{config_name}_config.json"
-        schema_path.parent.mkdir(exist_ok=True)
-        
-        with open(schema_path, 'w') as f:
-            f.write(schema_file)
-        
-        print(f"Generated config schema: {schema_path}")
-    
-    def generate_documentation(self, doc_type: str, topic: str) -> None:
-        """Generate documentation files."""
-        if doc_type == "api":
-            doc_content = f"""# {topic.replace('_', ' ').title()} API Documentation
+
+# API documentation page
+_API_DOC_TEMPLATE = """# {pretty} API Documentation
 
 ## Overview
 
@@ -322,7 +299,7 @@ Create new {topic}.
 ```json
 {{
   "success": true,
-  "message": "{topic.replace('_', ' ').title()} created successfully",
+  "message": "{pretty} created successfully",
   "data": {{
     "id": "string",
     "name": "string"
@@ -344,8 +321,9 @@ All endpoints may return the following error responses:
 
 <!-- Add usage examples -->
 """
-        elif doc_type == "user":
-            doc_content = f"""# {topic.replace('_', ' ').title()} User Guide
+
+# User guide page
+_USER_DOC_TEMPLATE = """# {pretty} User Guide
 
 ## Introduction
 
@@ -394,34 +372,145 @@ Another advanced feature explanation.
 - [Related Documentation](link)
 - [API Reference](link)
 """
+
+
+class HeliosCodeGenerator:
+    """Main code generator for Helios project scaffolding."""
+    
+    def __init__(self, project_root: str = "."):
+        self.project_root = Path(project_root)
+        self.templates_dir = self.project_root / "templates"
+        
+        # Edits to shared files are collected here and written once by flush(),
+        # which callers must call after their last generation
+        self._package_json: Optional[Dict[str, Any]] = None
+        self._package_json_dirty = False
+        self._pending_routers: List[str] = []
+        # Directories already created, so repeat generations skip mkdir
+        self._mkdir_cache: Set[Path] = set()
+        
+    def generate_extension_command(self, command_name: str, title: str, category: str = "Helios") -> None:
+        """Generate a new VS Code command for the extension."""
+        # Generate command implementation
+        ns = {
+            "command_name": command_name,
+            "camel": _to_camel_case(command_name),
+            "title": title,
+        }
+        command_file = _COMMAND_TEMPLATE.format_map(ns)
+        
+        command_path = self.project_root / "extension" / "src" / "commands" / f"{command_name.replace('-', '_')}.ts"
+        self._ensure_dir(command_path.parent)
+        
+        command_path.write_bytes(command_file.encode('utf-8'))
+        
+        print(f"Generated command file: {command_path}")
+        
+        # Update package.json
+        self._add_command_to_package_json(command_name, title, category)
+        
+    def generate_server_endpoint(self, endpoint_name: str, method: str = "POST") -> None:
+        """Generate a new FastAPI endpoint for the server."""
+        pascal, dashed, pretty = _name_forms(endpoint_name)
+        ns = {
+            "endpoint_name": endpoint_name,
+            "pascal": pascal,
+            "method": method.lower(),
+            "dashed": dashed,
+            "pretty": pretty,
+        }
+        endpoint_file = _ENDPOINT_TEMPLATE.format_map(ns)
+        
+        endpoint_path = self.project_root / "server" / "endpoints" / f"{endpoint_name}.py"
+        self._ensure_dir(endpoint_path.parent)
+        
+        endpoint_path.write_bytes(endpoint_file.encode('utf-8'))
+        
+        print(f"Generated endpoint file: {endpoint_path}")
+        
+        # Update main.py to include the router
+        self._add_router_to_main(endpoint_name)
+    
+    def generate_test_file(self, module_name: str, test_type: str = "unit") -> None:
+        """Generate a test file for a module."""
+        pascal, dashed, _ = _name_forms(module_name)
+        ns = {
+            "module_name": module_name,
+            "pascal": pascal,
+            "dashed": dashed,
+        }
+        if test_type == "unit":
+            test_file = _UNIT_TEST_TEMPLATE.format_map(ns)
+        elif test_type == "integration":
+            test_file = _INTEGRATION_TEST_TEMPLATE.format_map(ns)
+        
+        test_dir = "tests/unit" if test_type == "unit" else "tests/integration"
+        test_path = self.project_root / test_dir / f"test_{module_name}.py"
+        self._ensure_dir(test_path.parent)
+        
+        test_path.write_bytes(test_file.encode('utf-8'))
+        
+        print(f"Generated {test_type} test file: {test_path}")
+    
+    def generate_config_schema(self, config_name: str) -> None:
+        """Generate a configuration schema file."""
+        ns = {
+            "config_name": config_name,
+            "pretty": _name_forms(config_name)[2],
+        }
+        schema_file = _CONFIG_SCHEMA_TEMPLATE.format_map(ns)
+        
+        schema_path = self.project_root / "schemas" / f"{config_name}_config.json"
+        self._ensure_dir(schema_path.parent)
+        
+        schema_path.write_bytes(schema_file.encode('utf-8'))
+        
+        print(f"Generated config schema: {schema_path}")
+    
+    def generate_documentation(self, doc_type: str, topic: str) -> None:
+        """Generate documentation files."""
+        ns = {
+            "topic": topic,
+            "pretty": _name_forms(topic)[2],
+        }
+        if doc_type == "api":
+            doc_content = _API_DOC_TEMPLATE.format_map(ns)
+        elif doc_type == "user":
+            doc_content = _USER_DOC_TEMPLATE.format_map(ns)
         
         doc_path = self.project_root / "docs" / f"{topic}_{doc_type}.md"
-        doc_path.parent.mkdir(exist_ok=True)
+        self._ensure_dir(doc_path.parent)
         
-        with open(doc_path, 'w') as f:
-            f.write(doc_content)
+        doc_path.write_bytes(doc_content.encode('utf-8'))
         
         print(f"Generated {doc_type} documentation: {doc_path}")
     
+    def _ensure_dir(self, path: Path) -> None:
+        """Create a directory once per generator instance."""
+        if path not in self._mkdir_cache:
+            path.mkdir(parents=True, exist_ok=True)
+            self._mkdir_cache.add(path)
+    
     def _to_camel_case(self, snake_str: str) -> str:
         """Convert snake_case to camelCase."""
-        components = snake_str.split('_')
-        return components[0] + ''.join(word.capitalize() for word in components[1:])
+        return _to_camel_case(snake_str)
     
     def _to_pascal_case(self, snake_str: str) -> str:
         """Convert snake_case to PascalCase."""
-        return ''.join(word.capitalize() for word in snake_str.split('_'))
+        return _to_pascal_case(snake_str)
     
     def _add_command_to_package_json(self, command_name: str, title: str, category: str) -> None:
-        """Add command to package.json contributes section."""
+        """Add command to package.json contributes section (written on flush)."""
         package_json_path = self.project_root / "extension" / "package.json"
         
-        if not package_json_path.exists():
-            print(f"Warning: {package_json_path} not found")
-            return
+        if self._package_json is None:
+            if not package_json_path.exists():
+                print(f"Warning: {package_json_path} not found")
+                return
+            
+            self._package_json = _loads(package_json_path.read_bytes())
         
-        with open(package_json_path, 'r') as f:
-            package_data = json.load(f)
+        package_data = self._package_json
         
         # Add to contributes.commands
         if "contributes" not in package_data:
@@ -436,58 +525,96 @@ Another advanced feature explanation.
         }
         
         package_data["contributes"]["commands"].append(new_command)
-        
-        with open(package_json_path, 'w') as f:
-            json.dump(package_data, f, indent=2)
+        self._package_json_dirty = True
         
         print(f"Added command to package.json: helios.{command_name}")
     
     def _add_router_to_main(self, endpoint_name: str) -> None:
-        """Add router import and include to main.py."""
+        """Queue router import and include for main.py (written on flush)."""
         main_py_path = self.project_root / "server" / "main.py"
         
         if not main_py_path.exists():
             print(f"Warning: {main_py_path} not found")
             return
         
-        with open(main_py_path, 'r') as f:
-            content = f.read()
+        self._pending_routers.append(endpoint_name)
         
-        # Add import
-        import_line = f"from .endpoints.{endpoint_name} import router as {endpoint_name}_router"
-        if import_line not in content:
-            # Find a good place to add the import
-            lines = content.split('\n')
-            insert_index = 0
-            for i, line in enumerate(lines):
-                if line.startswith('from ') or line.startswith('import '):
-                    insert_index = i + 1
+        print(f"Added router to main.py: {endpoint_name}_router")
+    
+    def flush(self) -> None:
+        """Write all pending package.json and main.py edits, once per file."""
+        if self._package_json_dirty:
+            package_json_path = self.project_root / "extension" / "package.json"
+            package_json_path.write_bytes(_dumps_indented(self._package_json))
+            self._package_json_dirty = False
+        
+        if self._pending_routers:
+            main_py_path = self.project_root / "server" / "main.py"
+            with open(main_py_path, 'r') as f:
+                content = f.read()
             
-            lines.insert(insert_index, import_line)
-            content = '\n'.join(lines)
+            for endpoint_name in self._pending_routers:
+                content = self._insert_router(content, endpoint_name)
+            
+            main_py_path.write_bytes(content.encode('utf-8'))
+            self._pending_routers = []
+    
+    def _insert_router(self, content: str, endpoint_name: str) -> str:
+        """Return main.py content with the router import and include added."""
+        # Insertions are located by offset and spliced in with a single join
+        insertions = []
         
-        # Add router include
+        # Add import after the last top-level import line
+        import_line = f"from .endpoints.{endpoint_name} import router as {endpoint_name}_router"
+        if import_line not in content:
+            last_import = max(content.rfind('\nfrom '), content.rfind('\nimport '))
+            if last_import != -1:
+                insertions.append((self._end_of_line(content, last_import + 1), import_line + '\n'))
+            elif content.startswith(('from ', 'import ')):
+                insertions.append((self._end_of_line(content, 0), import_line + '\n'))
+            else:
+                insertions.append((0, import_line + '\n'))
+        
+        # Add router include after app creation
         include_line = f'app.include_router({endpoint_name}_router, prefix="/api", tags=["{endpoint_name}"])'
         if include_line not in content:
-            # Find app creation and add router after it
-            lines = content.split('\n')
-            for i, line in enumerate(lines):
-                if 'app = FastAPI(' in line:
-                    # Find the end of app creation
-                    j = i
-                    while j < len(lines) and not lines[j].strip().endswith(')'):
-                        j += 1
-                    lines.insert(j + 1, '')
-                    lines.insert(j + 2, include_line)
-                    break
-            
-            content = '\n'.join(lines)
-        
-        with open(main_py_path, 'w') as f:
-            f.write(content)
-        
-        print(f"Added router to main.py: {endpoint_name}_router")
-
+            app_end = self._find_app_call_end(content)
+            if app_end != -1:
+                insertions.append((self._end_of_line(content, app_end), '\n' + include_line + '\n'))
+        
+        if not insertions:
+            return content
+        
+        insertions.sort(key=lambda insertion: insertion[0])
+        pieces = []
+        previous = 0
+        for offset, text in insertions:
+            pieces.append(content[previous:offset])
+            if offset == len(content) and not content.endswith('\n'):
+                pieces.append('\n')
+            pieces.append(text)
+            previous = offset
+        pieces.append(content[previous:])
+        return ''.join(pieces)
+    
+    def _find_app_call_end(self, content: str) -> int:
+        """Return the offset of the paren closing `app = FastAPI(...)`, or -1."""
+        match = _APP_CALL_RE.search(content)
+        if match is None:
+            return -1
+        
+        # Balance parens so nested calls in the arguments are skipped over
+        depth = 1
+        for paren in _PAREN_RE.finditer(content, match.end()):
+            depth += 1 if paren.group() == '(' else -1
+            if depth == 0:
+                return paren.start()
+        return -1
+    
+    def _end_of_line(self, content: str, index: int) -> int:
+        """Return the offset just past the newline ending the line at index."""
+        newline = content.find('\n', index)
+        return len(content) if newline == -1 else newline + 1
 
 def main():
     """Main entry point for code generator."""
@@ -543,6 +670,7 @@ def main():
         elif args.command == "docs":
             generator.generate_documentation(args.type, args.topic)
         
+        generator.flush()
         print(f"\n✓ Successfully generated {args.command}")
         
     except Exception as e:
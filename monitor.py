@@ -5,27 +5,57 @@ Real-time monitoring of server performance and health
 """
 
 import time
-import requests
+import asyncio
+import urllib3
 import json
 import argparse
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime
 import sys
 
+from _compat import loads as _loads
+
+# Only continuous monitoring needs httpx, so monitor_continuous imports it
+# and one-shot commands don't pay for it
+httpx = None
+
 class HeliosMonitor:
+    # Request body used by the completion probes, encoded once
+    _TEST_COMPLETION_BODY = json.dumps({
+        "code": "def hello():",
+        "language": "python",
+        "position": {"line": 0, "character": 12},
+        "filename": "test.py"
+    }).encode()
+    _TEST_HEADERS = {"Content-Type": "application/json"}
+    
     def __init__(self, server_url="http://localhost:8000"):
         self.server_url = server_url
         self.monitoring = False
         
-    def check_health(self):
-        """Check server health"""
+        # One connection pool so successive probes reuse the same connection.
+        # urllib3 is used directly to avoid the import cost of requests.
+        self.http = urllib3.PoolManager(
+            num_pools=1,
+            maxsize=4,
+            retries=False,
+            timeout=urllib3.Timeout(connect=2, read=5)
+        )
+        
+    def check_health(self, parse_body=False):
+        """Check server health, decoding the response body only if parse_body"""
         try:
-            response = requests.get(f"{self.server_url}/health", timeout=5)
+            start_time = time.perf_counter()
+            response = self.http.request("GET", f"{self.server_url}/health")
+            end_time = time.perf_counter()
+            
+            healthy = response.status == 200
             return {
-                "status": "healthy" if response.status_code == 200 else "unhealthy",
-                "response_time": response.elapsed.total_seconds(),
-                "data": response.json() if response.status_code == 200 else None
+                "status": "healthy" if healthy else "unhealthy",
+                "response_time": end_time - start_time,
+                "data": _loads(response.data) if healthy and parse_body else None
             }
-        except requests.exceptions.RequestException as e:
+        except urllib3.exceptions.HTTPError as e:
             return {
                 "status": "unreachable",
                 "response_time": None,
@@ -35,85 +65,154 @@ class HeliosMonitor:
     def get_detailed_status(self):
         """Get detailed server status"""
         try:
-            response = requests.get(f"{self.server_url}/status", timeout=5)
-            if response.status_code == 200:
-                return response.json()
+            response = self.http.request("GET", f"{self.server_url}/status")
+            if response.status == 200:
+                return _loads(response.data)
             return None
-        except requests.exceptions.RequestException:
+        except urllib3.exceptions.HTTPError:
             return None
     
     def test_completion(self):
         """Test completion endpoint"""
-        test_request = {
-            "code": "def hello():",
-            "language": "python",
-            "position": {"line": 0, "character": 12},
-            "filename": "test.py"
-        }
-        
         try:
-            start_time = time.time()
-            response = requests.post(
+            start_time = time.perf_counter()
+            response = self.http.request(
+                "POST",
                 f"{self.server_url}/complete",
-                json=test_request,
+                body=self._TEST_COMPLETION_BODY,
+                headers=self._TEST_HEADERS,
+                timeout=urllib3.Timeout(connect=2, read=10)
+            )
+            end_time = time.perf_counter()
+            
+            return {
+                "status": "success" if response.status == 200 else "failed",
+                "response_time": end_time - start_time,
+                "status_code": response.status,
+                "data": _loads(response.data) if response.status == 200 else None
+            }
+        except urllib3.exceptions.HTTPError as e:
+            return {
+                "status": "error",
+                "error": str(e)
+            }
+    
+    # The async probes use the httpx client opened by monitor_continuous,
+    # which also imports httpx
+    async def _a_health(self, client, parse_body=False):
+        """Check server health without blocking the event loop"""
+        try:
+            response = await client.get("/health")
+            healthy = response.status_code == 200
+            return {
+                "status": "healthy" if healthy else "unhealthy",
+                "response_time": response.elapsed.total_seconds(),
+                "data": _loads(response.content) if healthy and parse_body else None
+            }
+        # ValueError covers a body that is not valid JSON
+        except (httpx.HTTPError, ValueError) as e:
+            return {
+                "status": "unreachable",
+                "response_time": None,
+                "error": str(e)
+            }
+    
+    async def _a_status(self, client):
+        """Get detailed server status without blocking the event loop"""
+        try:
+            response = await client.get("/status")
+            if response.status_code == 200:
+                return _loads(response.content)
+            return None
+        except (httpx.HTTPError, ValueError):
+            return None
+    
+    async def _a_completion(self, client):
+        """Test completion endpoint without blocking the event loop"""
+        try:
+            start_time = time.perf_counter()
+            response = await client.post(
+                "/complete",
+                content=self._TEST_COMPLETION_BODY,
+                headers=self._TEST_HEADERS,
                 timeout=10
             )
-            end_time = time.time()
+            end_time = time.perf_counter()
             
             return {
                 "status": "success" if response.status_code == 200 else "failed",
                 "response_time": end_time - start_time,
                 "status_code": response.status_code,
-                "data": response.json() if response.status_code == 200 else None
+                "data": _loads(response.content) if response.status_code == 200 else None
             }
-        except requests.exceptions.RequestException as e:
+        except (httpx.HTTPError, ValueError) as e:
             return {
                 "status": "error",
                 "error": str(e)
             }
     
-    def monitor_continuous(self, interval=30):
+    async def monitor_continuous(self, interval=30):
         """Continuously monitor server"""
         print(f"🔍 Starting continuous monitoring (interval: {interval}s)")
         print("Press Ctrl+C to stop")
         print("-" * 60)
         
+        global httpx
+        import httpx
+        
         self.monitoring = True
+        loop = asyncio.get_running_loop()
+        
+        # Cycles are scheduled against fixed deadlines so probe time does not
+        # stretch the interval
+        next_tick = loop.time() + interval
         
         try:
-            while self.monitoring:
-                timestamp = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
-                
-                # Health check
-                health = self.check_health()
-                status_icon = "🟢" if health["status"] == "healthy" else "🔴"
-                
-                print(f"[{timestamp}] {status_icon} Health: {health['status']}")
-                
-                if health["status"] == "healthy":
-                    print(f"  └─ Response time: {health['response_time']:.3f}s")
+            # The probes share one pooled client, closed when monitoring stops
+            async with httpx.AsyncClient(base_url=self.server_url, timeout=5.0) as client:
+                while self.monitoring:
+                    timestamp = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+                    
+                    health = await self._a_health(client)
+                    # Status and completion probes only run against a healthy
+                    # server, together in one round trip
+                    if health["status"] == "healthy":
+                        status, completion = await asyncio.gather(
+                            self._a_status(client), self._a_completion(client)
+                        )
+                    status_icon = "🟢" if health["status"] == "healthy" else "🔴"
+                    
+                    # Collect the cycle's lines and emit them in a single write
+                    lines = [f"[{timestamp}] {status_icon} Health: {health['status']}"]
                     
-                    # Detailed status
-                    status = self.get_detailed_status()
-                    if status:
-                        print(f"  └─ Model loaded: {status.get('model_loaded', 'Unknown')}")
-                        print(f"  └─ Uptime: {status.get('uptime', 0):.1f}s")
+                    if health["status"] == "healthy":
+                        lines.append(f"  └─ Response time: {health['response_time']:.3f}s")
+                        
+                        # Detailed status
+                        if status:
+                            lines.append(f"  └─ Model loaded: {status.get('model_loaded', 'Unknown')}")
+                            lines.append(f"  └─ Uptime: {status.get('uptime', 0):.1f}s")
+                        
+                        # Test completion
+                        if completion["status"] == "success":
+                            lines.append(f"  └─ Completion test: ✅ ({completion['response_time']:.3f}s)")
+                        else:
+                            lines.append(f"  └─ Completion test: ❌ ({completion.get('error', 'Failed')})")
                     
-                    # Test completion
-                    completion = self.test_completion()
-                    if completion["status"] == "success":
-                        print(f"  └─ Completion test: ✅ ({completion['response_time']:.3f}s)")
                     else:
-                        print(f"  └─ Completion test: ❌ ({completion.get('error', 'Failed')})")
-                
-                else:
-                    print(f"  └─ Error: {health.get('error', 'Unknown')}")
-                
-                print()
-                time.sleep(interval)
-                
-        except KeyboardInterrupt:
-            print("\n🛑 Monitoring stopped")
+                        lines.append(f"  └─ Error: {health.get('error', 'Unknown')}")
+                    
+                    lines.append("")
+                    sys.stdout.write("\n".join(lines) + "\n")
+                    sys.stdout.flush()
+                    
+                    # Skip any deadlines a slow cycle has already overrun
+                    now = loop.time()
+                    while interval > 0 and next_tick <= now:
+                        next_tick += interval
+                    await asyncio.sleep(next_tick - now)
+        
+        finally:
             self.monitoring = False
     
     def run_health_check(self):
@@ -121,7 +220,7 @@ class HeliosMonitor:
         print("🏥 Helios Server Health Check")
         print("-" * 30)
         
-        health = self.check_health()
+        health = self.check_health(parse_body=True)
         
         if health["status"] == "healthy":
             print("✅ Server is healthy")
@@ -148,25 +247,32 @@ class HeliosMonitor:
         print("🚀 Helios Performance Test")
         print("-" * 25)
         
-        # Multiple completion tests
-        response_times = []
+        # Multiple completion tests, reduced to running stats in one pass
+        total_time = 0.0
+        min_time = float("inf")
+        max_time = 0.0
         success_count = 0
         
-        for i in range(5):
-            print(f"Test {i+1}/5... ", end="", flush=True)
-            result = self.test_completion()
+        # The calls are I/O bound, so run them concurrently and report in order
+        print("Running 5 concurrent completion requests...", flush=True)
+        with ThreadPoolExecutor(max_workers=5) as executor:
+            results = list(executor.map(lambda _: self.test_completion(), range(5)))
+        
+        for i, result in enumerate(results):
+            print(f"Test {i+1}/5... ", end="")
             
             if result["status"] == "success":
-                response_times.append(result["response_time"])
+                rt = result["response_time"]
+                total_time += rt
+                min_time = rt if rt < min_time else min_time
+                max_time = rt if rt > max_time else max_time
                 success_count += 1
-                print(f"✅ {result['response_time']:.3f}s")
+                print(f"✅ {rt:.3f}s")
             else:
                 print(f"❌ {result.get('error', 'Failed')}")
         
-        if response_times:
-            avg_time = sum(response_times) / len(response_times)
-            min_time = min(response_times)
-            max_time = max(response_times)
+        if success_count:
+            avg_time = total_time / success_count
             
             print(f"\n📊 Results:")
             print(f"   Success rate: {success_count}/5 ({success_count/5*100:.1f}%)")
@@ -210,7 +316,10 @@ def main():
     
     elif args.command == "monitor":
         interval = getattr(args, 'interval', 30)
-        monitor.monitor_continuous(interval)
+        try:
+            asyncio.run(monitor.monitor_continuous(interval))
+        except KeyboardInterrupt:
+            print("\n🛑 Monitoring stopped")
     
     elif args.command == "test":
         monitor.run_performance_test()
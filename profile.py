@@ -8,18 +8,78 @@ Profiles completion latency, memory usage, model inference time, and system reso
 
 import time
 import psutil
-import json
+import functools
 import asyncio
 import aiohttp
-import statistics
-from typing import Dict, List, Optional, Tuple
+import numpy as np
+from array import array
+from collections import deque
+from typing import Dict, List, Optional, Sequence, Tuple
 from dataclasses import dataclass, asdict
 from datetime import datetime
 import argparse
 import sys
 
+from _compat import (SLOTS as _SLOTS, dumps as _dumps, dumps_indented as _dumps_indented,
+                     loads as _loads, run as _run)
 
-@dataclass
+# tiktoken gives real token counts when the server does not report them
+try:
+    import tiktoken
+except ImportError:
+    tiktoken = None
+
+# Seconds between resource samples, and how many samples are kept
+SAMPLE_INTERVAL = 0.25
+MAX_SAMPLES = 4096
+
+
+def _weibull_quantile(values, q):
+    """Quantiles by the "weibull" (exclusive) method.
+    
+    numpy only accepts method= from 1.22, so older releases interpolate the
+    sorted values at rank (n + 1) * q by hand.
+    """
+    try:
+        return np.quantile(values, q, method="weibull")
+    except TypeError:
+        ordered = np.sort(values)
+        rank = np.clip((len(ordered) + 1) * np.asarray(q) - 1, 0, len(ordered) - 1)
+        lower = np.floor(rank).astype(np.intp)
+        upper = np.minimum(lower + 1, len(ordered) - 1)
+        return ordered[lower] + (rank - lower) * (ordered[upper] - ordered[lower])
+
+
+@functools.lru_cache(maxsize=1)
+def _token_encoder():
+    """Return the tiktoken encoding used to count tokens, or None."""
+    if tiktoken is None:
+        return None
+    try:
+        return tiktoken.get_encoding("cl100k_base")
+    except Exception:
+        # The encoding data could not be loaded, e.g. offline on first use
+        return None
+
+
+def count_tokens(result: Dict) -> int:
+    """Return the number of tokens generated in a completion response.
+    
+    Uses the server's own count when the response has one, then tiktoken,
+    and finally a whitespace split.
+    """
+    tokens = result.get('tokens')
+    if tokens is not None:
+        return tokens
+    
+    completion = result.get('completion', '')
+    encoder = _token_encoder()
+    if encoder is not None:
+        return len(encoder.encode(completion))
+    return len(completion.split())
+
+
+@dataclass(frozen=True, **_SLOTS)
 class ProfileResult:
     """Results from a single profiling run."""
     timestamp: str
@@ -34,7 +94,7 @@ class ProfileResult:
     error_message: Optional[str] = None
 
 
-@dataclass
+@dataclass(frozen=True, **_SLOTS)
 class ProfileSummary:
     """Summary statistics from multiple profiling runs."""
     total_tests: int
@@ -50,65 +110,167 @@ class ProfileSummary:
     max_cpu_usage_percent: float
     total_tokens_generated: int
     avg_tokens_per_second: float
+    # False when there were too few results to estimate p95/p99, which
+    # then hold the slowest observed time
+    tail_percentiles_estimated: bool = True
 
 
 class HeliosProfiler:
     """Main profiler class for Helios performance testing."""
     
-    def __init__(self, server_url: str = "http://localhost:8000"):
+    # Below this many successful results the p95/p99 are reported as the
+    # slowest observed time rather than an estimate
+    min_samples_for_quantile = 20
+    
+    def __init__(self, server_url: str = "http://localhost:8000", server_pid: Optional[int] = None,
+                 results_log: Optional[str] = None):
         self.server_url = server_url
+        self.server_pid = server_pid
+        # Results are kept in memory unless they are streamed to a JSON Lines log
         self.results: List[ProfileResult] = []
+        self.total_tests = 0
+        self.results_log = results_log
+        self._results_log_file = open(results_log, 'ab') if results_log else None
+        self._session: Optional[aiohttp.ClientSession] = None
+        # (perf_counter_ns, memory MB, CPU %) samples from _resource_sampler
+        self._samples: deque = deque(maxlen=MAX_SAMPLES)
+        # Columns of successful-result metrics, appended by _record and read
+        # by the summary as contiguous arrays
+        self._completion_ms = array('d')
+        self._memory_mb = array('d')
+        self._cpu_percent = array('d')
+        self._tokens_generated = 0
+        # (result count, summary) from the last generate_summary call
+        self._summary_cache: Optional[Tuple[int, ProfileSummary]] = None
+    
+    def _get_session(self) -> aiohttp.ClientSession:
+        """Return the shared HTTP session, creating it on first use."""
+        # One pooled session keeps connections alive across requests
+        if self._session is None or self._session.closed:
+            self._session = aiohttp.ClientSession(
+                connector=aiohttp.TCPConnector(limit=256, keepalive_timeout=60)
+            )
+        return self._session
+    
+    async def close(self) -> None:
+        """Close the shared HTTP session and the results log."""
+        if self._session is not None:
+            await self._session.close()
+            self._session = None
+        if self._results_log_file is not None:
+            self._results_log_file.close()
+            self._results_log_file = None
         
+    def _record(self, result: ProfileResult) -> None:
+        """Store or log a result and append its metrics to the summary columns."""
+        self.total_tests += 1
+        if self._results_log_file is not None:
+            # Flushed per line so partial runs survive a crash
+            self._results_log_file.write(_dumps(result, default=asdict) + b"\n")
+            self._results_log_file.flush()
+        else:
+            self.results.append(result)
+        
+        if result.success:
+            self._completion_ms.append(result.completion_time_ms)
+            self._memory_mb.append(result.memory_usage_mb)
+            self._cpu_percent.append(result.cpu_usage_percent)
+            self._tokens_generated += result.tokens_generated
+    
+    async def _resource_sampler(self, interval: float = SAMPLE_INTERVAL) -> None:
+        """Poll memory and CPU usage into the sample buffer until cancelled.
+        
+        Samples the server process when its PID is known, and the whole
+        system otherwise.
+        """
+        try:
+            # A PID that has already exited fails here the same way it does
+            # mid-run, so both take the warning path below
+            process = psutil.Process(self.server_pid) if self.server_pid else None
+            
+            # The first cpu_percent() call only primes the counters
+            if process is not None:
+                process.cpu_percent(interval=None)
+            else:
+                psutil.cpu_percent(interval=None)
+            
+            while True:
+                if process is not None:
+                    memory = process.memory_info().rss
+                    cpu = process.cpu_percent(interval=None)
+                else:
+                    memory = psutil.virtual_memory().used
+                    cpu = psutil.cpu_percent(interval=None)
+                
+                self._samples.append((time.perf_counter_ns(), memory / 1024 / 1024, cpu))
+                await asyncio.sleep(interval)
+        except psutil.NoSuchProcess:
+            print(f"Warning: server process {self.server_pid} exited, resource sampling stopped")
+    
+    def _window_usage(self, start_ns: int, end_ns: int) -> Tuple[float, float]:
+        """Return peak memory (MB) and average CPU (%) sampled over [start_ns, end_ns]."""
+        # Walk back from the newest sample, stopping at the one in effect at start
+        window = []
+        for sample in reversed(self._samples):
+            if sample[0] <= end_ns:
+                window.append(sample)
+                if sample[0] < start_ns:
+                    break
+        
+        if not window:
+            return 0.0, 0.0
+        
+        peak_memory = max(sample[1] for sample in window)
+        avg_cpu = sum(sample[2] for sample in window) / len(window)
+        return peak_memory, avg_cpu
+    
     async def profile_completion(self, prompt: str, test_name: str) -> ProfileResult:
         """Profile a single completion request."""
-        start_time = time.time()
-        start_memory = psutil.virtual_memory().used / 1024 / 1024
-        start_cpu = psutil.cpu_percent()
+        # Latencies use the monotonic high-resolution counter
+        start_ns = time.perf_counter_ns()
         
         try:
-            async with aiohttp.ClientSession() as session:
-                # Time the inference request
-                inference_start = time.time()
-                
-                async with session.post(
-                    f"{self.server_url}/completion",
-                    json={
-                        "prompt": prompt,
-                        "max_tokens": 100,
-                        "temperature": 0.7
-                    }
-                ) as response:
-                    if response.status == 200:
-                        result = await response.json()
-                        inference_time = (time.time() - inference_start) * 1000
-                        
-                        # Calculate metrics
-                        completion_time = (time.time() - start_time) * 1000
-                        end_memory = psutil.virtual_memory().used / 1024 / 1024
-                        end_cpu = psutil.cpu_percent()
-                        
-                        memory_usage = end_memory - start_memory
-                        cpu_usage = max(end_cpu - start_cpu, 0)
-                        
-                        tokens_generated = len(result.get('completion', '').split())
-                        
-                        return ProfileResult(
-                            timestamp=datetime.now().isoformat(),
-                            test_name=test_name,
-                            completion_time_ms=completion_time,
-                            inference_time_ms=inference_time,
-                            memory_usage_mb=memory_usage,
-                            cpu_usage_percent=cpu_usage,
-                            tokens_generated=tokens_generated,
-                            prompt_length=len(prompt),
-                            success=True
-                        )
-                    else:
-                        error_msg = f"HTTP {response.status}: {await response.text()}"
-                        raise Exception(error_msg)
-                        
+            session = self._get_session()
+            
+            # Time the inference request
+            inference_start_ns = time.perf_counter_ns()
+            
+            async with session.post(
+                f"{self.server_url}/completion",
+                json={
+                    "prompt": prompt,
+                    "max_tokens": 100,
+                    "temperature": 0.7
+                }
+            ) as response:
+                if response.status == 200:
+                    result = await response.json()
+                    end_ns = time.perf_counter_ns()
+                    inference_time = (end_ns - inference_start_ns) / 1e6
+                    
+                    # Calculate metrics; resource usage comes from the sampler
+                    completion_time = (end_ns - start_ns) / 1e6
+                    memory_usage, cpu_usage = self._window_usage(start_ns, end_ns)
+                    
+                    tokens_generated = count_tokens(result)
+                    
+                    return ProfileResult(
+                        timestamp=datetime.now().isoformat(),
+                        test_name=test_name,
+                        completion_time_ms=completion_time,
+                        inference_time_ms=inference_time,
+                        memory_usage_mb=memory_usage,
+                        cpu_usage_percent=cpu_usage,
+                        tokens_generated=tokens_generated,
+                        prompt_length=len(prompt),
+                        success=True
+                    )
+                else:
+                    error_msg = f"HTTP {response.status}: {await response.text()}"
+                    raise Exception(error_msg)
+                    
         except Exception as e:
-            completion_time = (time.time() - start_time) * 1000
+            completion_time = (time.perf_counter_ns() - start_ns) / 1e6
             return ProfileResult(
                 timestamp=datetime.now().isoformat(),
                 test_name=test_name,
@@ -122,39 +284,75 @@ class HeliosProfiler:
                 error_message=str(e)
             )
     
-    async def run_test_suite(self, test_cases: List[Tuple[str, str]], iterations: int = 1) -> None:
-        """Run a suite of performance tests."""
+    async def run_test_suite(self, test_cases: Sequence[Tuple[str, str]], iterations: int = 1,
+                             concurrency: int = 8, interval_ms: float = 0) -> None:
+        """Run a suite of performance tests, up to `concurrency` requests at a time.
+        
+        With `interval_ms` set, request starts are paced that far apart.
+        """
         print(f"Running performance tests with {iterations} iterations each...")
         print(f"Server: {self.server_url}")
         print(f"Test cases: {len(test_cases)}")
+        print(f"Concurrency: {concurrency}")
+        if interval_ms > 0:
+            print(f"Interval: {interval_ms:g}ms")
         print("-" * 60)
         
         total_tests = len(test_cases) * iterations
         completed = 0
+        semaphore = asyncio.Semaphore(max(1, concurrency))
+        sampler = asyncio.create_task(self._resource_sampler())
+        loop = asyncio.get_running_loop()
+        interval = interval_ms / 1000
+        start = loop.time()
         
-        for test_name, prompt in test_cases:
-            for i in range(iterations):
-                result = await self.profile_completion(prompt, f"{test_name}_{i+1}")
-                self.results.append(result)
+        async def run_one(index: int, test_name: str, prompt: str,
+                          iteration: int) -> Tuple[str, ProfileResult]:
+            # Each start has its own deadline on the monotonic loop clock, so
+            # slow requests do not push back the ones after them
+            if interval > 0:
+                await asyncio.sleep(start + index * interval - loop.time())
+            async with semaphore:
+                return test_name, await self.profile_completion(prompt, f"{test_name}_{iteration}")
+        
+        cases = [
+            (test_name, prompt, i + 1)
+            for test_name, prompt in test_cases
+            for i in range(iterations)
+        ]
+        tasks = [run_one(index, *case) for index, case in enumerate(cases)]
+        
+        try:
+            # Report progress in arrival order
+            for next_done in asyncio.as_completed(tasks):
+                test_name, result = await next_done
+                self._record(result)
                 completed += 1
                 
                 status = "✓" if result.success else "✗"
                 print(f"{status} [{completed:3d}/{total_tests}] {test_name} - "
                       f"{result.completion_time_ms:.1f}ms "
                       f"({result.tokens_generated} tokens)")
-                
-                # Small delay between requests
-                await asyncio.sleep(0.1)
+        finally:
+            sampler.cancel()
     
     def generate_summary(self) -> ProfileSummary:
         """Generate summary statistics from all results."""
-        successful_results = [r for r in self.results if r.success]
+        # Results are only ever added, so their count identifies the cached summary
+        if self._summary_cache is None or self._summary_cache[0] != self.total_tests:
+            self._summary_cache = (self.total_tests, self._compute_summary())
+        return self._summary_cache[1]
+    
+    def _compute_summary(self) -> ProfileSummary:
+        """Compute summary statistics over the current results."""
+        completion_times = np.frombuffer(self._completion_ms, dtype=np.float64)
+        successful_tests = completion_times.size
         
-        if not successful_results:
+        if not successful_tests:
             return ProfileSummary(
-                total_tests=len(self.results),
+                total_tests=self.total_tests,
                 successful_tests=0,
-                failed_tests=len(self.results),
+                failed_tests=self.total_tests,
                 avg_completion_time_ms=0,
                 median_completion_time_ms=0,
                 p95_completion_time_ms=0,
@@ -164,51 +362,63 @@ class HeliosProfiler:
                 avg_cpu_usage_percent=0,
                 max_cpu_usage_percent=0,
                 total_tokens_generated=0,
-                avg_tokens_per_second=0
+                avg_tokens_per_second=0,
+                tail_percentiles_estimated=False
             )
         
-        completion_times = [r.completion_time_ms for r in successful_results]
-        memory_usage = [r.memory_usage_mb for r in successful_results]
-        cpu_usage = [r.cpu_usage_percent for r in successful_results]
-        total_tokens = sum(r.tokens_generated for r in successful_results)
-        total_time_seconds = sum(r.completion_time_ms for r in successful_results) / 1000
+        memory_usage = np.frombuffer(self._memory_mb, dtype=np.float64)
+        cpu_usage = np.frombuffer(self._cpu_percent, dtype=np.float64)
+        total_tokens = self._tokens_generated
+        total_time_seconds = float(completion_times.sum()) / 1000
+        
+        # Median and tail percentiles from one quantile call; "weibull" is
+        # the exclusive method statistics.quantiles used. Too few samples
+        # cannot resolve the tail, so short runs report their maximum.
+        tail_estimated = successful_tests >= self.min_samples_for_quantile
+        if tail_estimated:
+            median, p95, p99 = _weibull_quantile(completion_times, [0.5, 0.95, 0.99])
+        else:
+            median = _weibull_quantile(completion_times, 0.5)
+            p95 = p99 = completion_times.max()
         
         return ProfileSummary(
-            total_tests=len(self.results),
-            successful_tests=len(successful_results),
-            failed_tests=len(self.results) - len(successful_results),
-            avg_completion_time_ms=statistics.mean(completion_times),
-            median_completion_time_ms=statistics.median(completion_times),
-            p95_completion_time_ms=statistics.quantiles(completion_times, n=20)[18] if len(completion_times) > 1 else completion_times[0],
-            p99_completion_time_ms=statistics.quantiles(completion_times, n=100)[98] if len(completion_times) > 1 else completion_times[0],
-            avg_memory_usage_mb=statistics.mean(memory_usage),
-            max_memory_usage_mb=max(memory_usage),
-            avg_cpu_usage_percent=statistics.mean(cpu_usage),
-            max_cpu_usage_percent=max(cpu_usage),
+            total_tests=self.total_tests,
+            successful_tests=successful_tests,
+            failed_tests=self.total_tests - successful_tests,
+            avg_completion_time_ms=float(completion_times.mean()),
+            median_completion_time_ms=float(median),
+            p95_completion_time_ms=float(p95),
+            p99_completion_time_ms=float(p99),
+            avg_memory_usage_mb=float(memory_usage.mean()),
+            max_memory_usage_mb=float(memory_usage.max()),
+            avg_cpu_usage_percent=float(cpu_usage.mean()),
+            max_cpu_usage_percent=float(cpu_usage.max()),
             total_tokens_generated=total_tokens,
-            avg_tokens_per_second=total_tokens / total_time_seconds if total_time_seconds > 0 else 0
+            avg_tokens_per_second=total_tokens / total_time_seconds if total_time_seconds > 0 else 0,
+            tail_percentiles_estimated=tail_estimated
         )
     
     def save_results(self, filename: str) -> None:
         """Save detailed results and summary to JSON file."""
         summary = self.generate_summary()
         
-        output = {
-            "summary": asdict(summary),
-            "results": [asdict(result) for result in self.results],
-            "metadata": {
-                "profiler_version": "1.0.0",
-                "server_url": self.server_url,
-                "system_info": {
-                    "cpu_count": psutil.cpu_count(),
-                    "memory_gb": psutil.virtual_memory().total / 1024 / 1024 / 1024,
-                    "platform": sys.platform
-                }
+        output = {"summary": summary}
+        if self.results_log:
+            output["results_log"] = self.results_log
+        else:
+            output["results"] = self.results
+        output["metadata"] = {
+            "profiler_version": "1.0.0",
+            "server_url": self.server_url,
+            "system_info": {
+                "cpu_count": psutil.cpu_count(),
+                "memory_gb": psutil.virtual_memory().total / 1024 / 1024 / 1024,
+                "platform": sys.platform
             }
         }
         
-        with open(filename, 'w') as f:
-            json.dump(output, f, indent=2)
+        with open(filename, 'wb') as f:
+            f.write(_dumps_indented(output, default=asdict))
         
         print(f"\nResults saved to {filename}")
     
@@ -229,6 +439,9 @@ class HeliosProfiler:
         print(f"  Median:        {summary.median_completion_time_ms:.1f}ms")
         print(f"  95th percentile: {summary.p95_completion_time_ms:.1f}ms")
         print(f"  99th percentile: {summary.p99_completion_time_ms:.1f}ms")
+        if summary.successful_tests and not summary.tail_percentiles_estimated:
+            print(f"  Warning: only {summary.successful_tests} successful results, so p95/p99 "
+                  f"are the slowest time (needs {self.min_samples_for_quantile})")
         print()
         print("RESOURCE USAGE:")
         print(f"  Avg Memory:    {summary.avg_memory_usage_mb:.1f}MB")
@@ -241,20 +454,24 @@ class HeliosProfiler:
         print(f"  Tokens/sec:    {summary.avg_tokens_per_second:.1f}")
 
 
-def get_default_test_cases() -> List[Tuple[str, str]]:
+# Default profiling prompts as (name, prompt) pairs, built once at import
+DEFAULT_TEST_CASES: Tuple[Tuple[str, str], ...] = (
+    ("simple_function", "def calculate_fibonacci(n):"),
+    ("class_definition", "class UserManager:"),
+    ("import_statement", "import"),
+    ("complex_algorithm", "def quicksort(arr):\n    if len(arr) <= 1:\n        return arr\n    pivot = arr[len(arr) // 2]\n    left = [x for x in arr if x < pivot]\n    middle = [x for x in arr if x == pivot]\n    right = [x for x in arr if x > pivot]\n    return"),
+    ("error_handling", "try:\n    result = process_data()\nexcept"),
+    ("async_function", "async def fetch_data(url):\n    async with aiohttp.ClientSession() as session:\n        async with session.get(url) as response:"),
+    ("list_comprehension", "squared_numbers = [x**2 for x in range(10) if"),
+    ("docstring", 'def complex_function(a, b, c):\n    """'),
+    ("decorator", "@"),
+    ("context_manager", "with open('file.txt', 'r') as f:"),
+)
+
+
+def get_default_test_cases() -> Tuple[Tuple[str, str], ...]:
     """Get default test cases for profiling."""
-    return [
-        ("simple_function", "def calculate_fibonacci(n):"),
-        ("class_definition", "class UserManager:"),
-        ("import_statement", "import"),
-        ("complex_algorithm", "def quicksort(arr):\n    if len(arr) <= 1:\n        return arr\n    pivot = arr[len(arr) // 2]\n    left = [x for x in arr if x < pivot]\n    middle = [x for x in arr if x == pivot]\n    right = [x for x in arr if x > pivot]\n    return"),
-        ("error_handling", "try:\n    result = process_data()\nexcept"),
-        ("async_function", "async def fetch_data(url):\n    async with aiohttp.ClientSession() as session:\n        async with session.get(url) as response:"),
-        ("list_comprehension", "squared_numbers = [x**2 for x in range(10) if"),
-        ("docstring", 'def complex_function(a, b, c):\n    """'),
-        ("decorator", "@"),
-        ("context_manager", "with open('file.txt', 'r') as f:")
-    ]
+    return DEFAULT_TEST_CASES
 
 
 async def main():
@@ -267,23 +484,33 @@ async def main():
     parser.add_argument("--output", default="helios_profile.json",
                        help="Output file for results (default: helios_profile.json)")
     parser.add_argument("--test-cases", help="JSON file with custom test cases")
+    parser.add_argument("--concurrency", type=int, default=8,
+                       help="Maximum requests in flight at once (default: 8)")
+    parser.add_argument("--interval-ms", type=float, default=0,
+                       help="Delay between request starts in milliseconds (default: 0, no pacing)")
+    parser.add_argument("--server-pid", type=int,
+                       help="PID of the server process to sample (default: whole system)")
+    parser.add_argument("--results-log",
+                       help="Stream each result to this JSON Lines file instead of keeping "
+                            "them in memory; --output then holds only the summary")
     
     args = parser.parse_args()
     
     # Load test cases
     if args.test_cases:
-        with open(args.test_cases, 'r') as f:
-            test_data = json.load(f)
+        with open(args.test_cases, 'rb') as f:
+            test_data = _loads(f.read())
             test_cases = [(case["name"], case["prompt"]) for case in test_data["test_cases"]]
     else:
         test_cases = get_default_test_cases()
     
     # Initialize profiler
-    profiler = HeliosProfiler(args.server)
+    profiler = HeliosProfiler(args.server, args.server_pid, args.results_log)
     
     try:
         # Run tests
-        await profiler.run_test_suite(test_cases, args.iterations)
+        await profiler.run_test_suite(test_cases, args.iterations, args.concurrency,
+                                     args.interval_ms)
         
         # Print and save results
         profiler.print_summary()
@@ -291,13 +518,15 @@ async def main():
         
     except KeyboardInterrupt:
         print("\nProfiling interrupted by user")
-        if profiler.results:
+        if profiler.total_tests:
             profiler.print_summary()
             profiler.save_results(args.output)
     except Exception as e:
         print(f"Error during profiling: {e}")
         sys.exit(1)
+    finally:
+        await profiler.close()
 
 
 if __name__ == "__main__":
-    asyncio.run(main())
\ No newline at end of file
+    _run(main())
\ No newline at end of file
@@ -9,51 +9,250 @@ import time
 import statistics
 import json
 import argparse
-from typing import List, Dict, Any
+from types import MappingProxyType
+from typing import List, Dict, Any, Mapping, Optional, Tuple, Union
 import aiohttp
-import matplotlib.pyplot as plt
-import seaborn as sns
+import httpx
+
+# Same optional uvloop and orjson speedups as the top-level scripts' _compat.py;
+# server/ ships without the repo root, so it keeps its own copy
+try:
+    import uvloop
+except ImportError:
+    uvloop = None
+
+if uvloop is None:
+    _run = asyncio.run
+elif hasattr(uvloop, "run"):
+    _run = uvloop.run
+else:
+    def _run(main):
+        uvloop.install()
+        return asyncio.run(main)
+
+try:
+    import orjson
+    _dumps = orjson.dumps
+
+    def _dumps_indented(obj: Any) -> bytes:
+        return orjson.dumps(obj, option=orjson.OPT_INDENT_2)
+except ImportError:
+    def _dumps(obj: Any) -> bytes:
+        return json.dumps(obj).encode('utf-8')
+
+    def _dumps_indented(obj: Any) -> bytes:
+        return json.dumps(obj, indent=2).encode('utf-8')
+
+# HTTP/2 lets httpx multiplex concurrent requests over one connection, but
+# needs the optional h2 package
+try:
+    import h2  # noqa: F401
+    _HTTP2 = True
+except ImportError:
+    _HTTP2 = False
+
+JSON_HEADERS = {"Content-Type": "application/json"}
+
+# HTTP clients the benchmark can drive; the first is the default
+CLIENTS = ("httpx", "aiohttp")
+Session = Union[httpx.AsyncClient, aiohttp.ClientSession]
+
+# Batch sizes swept by the batch throughput test
+BATCH_SIZES = (1, 2, 4, 8, 16, 32)
+
+
+def completion_tokens(completion: Dict[str, Any]) -> int:
+    """Tokens in a completion result: the server's count if it sends one,
+    otherwise a whitespace split of the suggestion"""
+    tokens = completion.get("tokens")
+    if tokens is not None:
+        return tokens
+    return len(completion.get("suggestion", "").split())
+
+
+# Benchmark scenarios, built once. Each carries its request pre-encoded as
+# "payload" so repeated sends skip JSON serialization.
+_TEST_CASE_DATA = (
+    {
+        "name": "Python function",
+        "data": {
+            "code": "def quicksort(arr):\n    if len(arr) <= 1:\n        return arr\n    pivot = arr[len(arr) // 2]\n    ",
+            "language": "python",
+            "position": {"line": 4, "character": 4},
+            "filename": "sorting.py"
+        }
+    },
+    {
+        "name": "JavaScript class",
+        "data": {
+            "code": "class Calculator {\n    constructor() {\n        this.history = [];\n    }\n    \n    add(a, b) {\n        ",
+            "language": "javascript",
+            "position": {"line": 6, "character": 8},
+            "filename": "calculator.js"
+        }
+    },
+    {
+        "name": "TypeScript interface",
+        "data": {
+            "code": "interface User {\n    id: number;\n    name: string;\n    email: string;\n}\n\nfunction createUser(userData: Partial<User>): User {\n    ",
+            "language": "typescript",
+            "position": {"line": 7, "character": 4},
+            "filename": "user.ts"
+        }
+    },
+    {
+        "name": "Complex algorithm",
+        "data": {
+            "code": "def dijkstra(graph, start):\n    distances = {node: float('infinity') for node in graph}\n    distances[start] = 0\n    unvisited = set(graph.keys())\n    \n    while unvisited:\n        ",
+            "language": "python",
+            "position": {"line": 6, "character": 8},
+            "filename": "graph.py"
+        }
+    }
+)
+TEST_CASES = tuple(
+    MappingProxyType({**case, "payload": _dumps(case["data"])})
+    for case in _TEST_CASE_DATA
+)
+
+
+def _percentile(values: List[float], q: float) -> float:
+    """Return the q quantile (0-1) of values, interpolating linearly.
+    
+    A single sample is its own percentile and an empty list gives 0.
+    """
+    if not values:
+        return 0.0
+    
+    ordered = sorted(values)
+    position = q * (len(ordered) - 1)
+    lower = int(position)
+    upper = min(lower + 1, len(ordered) - 1)
+    return ordered[lower] + (ordered[upper] - ordered[lower]) * (position - lower)
+
 
 class HeliosBenchmark:
-    def __init__(self, server_url: str = "http://localhost:8000"):
+    def __init__(self, server_url: str = "http://localhost:8000", client: str = CLIENTS[0]):
+        if client not in CLIENTS:
+            raise ValueError(f"Unknown client {client!r}, expected one of {CLIENTS}")
+        
         self.server_url = server_url
+        self.client = client
         self.results: List[Dict[str, Any]] = []
     
-    async def single_completion_test(self, session: aiohttp.ClientSession, 
-                                   request_data: Dict[str, Any]) -> Dict[str, Any]:
-        """Test a single completion request"""
-        start_time = time.time()
+    def _open_session(self) -> Session:
+        """Create a session for the configured client, to be used with `async with`"""
+        if self.client == "aiohttp":
+            return aiohttp.ClientSession()
+        
+        # One long-lived pool sized for the concurrent and load phases.
+        # HTTP/2 is only negotiated over TLS; plain http stays on keep-alive HTTP/1.1.
+        return httpx.AsyncClient(
+            http2=_HTTP2,
+            timeout=30,
+            limits=httpx.Limits(max_connections=64, max_keepalive_connections=64)
+        )
+    
+    async def _request(self, session: Session, method: str, path: str,
+                       body: Optional[bytes] = None) -> Tuple[int, Optional[Dict[str, Any]]]:
+        """Send a request with either client, returning the status and the JSON body on 200"""
+        url = f"{self.server_url}{path}"
+        headers = JSON_HEADERS if body is not None else None
+        
+        if isinstance(session, aiohttp.ClientSession):
+            async with session.request(method, url, data=body, headers=headers) as response:
+                if response.status != 200:
+                    return response.status, None
+                return response.status, await response.json()
+        
+        response = await session.request(method, url, content=body, headers=headers)
+        if response.status_code != 200:
+            return response.status_code, None
+        return response.status_code, response.json()
+    
+    async def single_completion_test(self, session: Session, 
+                                   request_data: Union[Dict[str, Any], bytes]) -> Dict[str, Any]:
+        """Test a single completion request
+        
+        request_data may be a dict or an already JSON-encoded body, which
+        callers sending the same request repeatedly encode once.
+        """
+        if not isinstance(request_data, bytes):
+            request_data = _dumps(request_data)
+        
+        # Latencies use the monotonic high-resolution counter
+        start_ns = time.perf_counter_ns()
         
         try:
-            async with session.post(f"{self.server_url}/complete", 
-                                  json=request_data) as response:
-                if response.status == 200:
-                    result = await response.json()
-                    end_time = time.time()
-                    
-                    return {
-                        "success": True,
-                        "response_time": end_time - start_time,
-                        "suggestion_length": len(result.get("suggestion", "")),
-                        "confidence": result.get("confidence", 0),
-                        "server_processing_time": result.get("processing_time", 0)
-                    }
-                else:
-                    return {
-                        "success": False,
-                        "response_time": time.time() - start_time,
-                        "error": f"HTTP {response.status}"
-                    }
+            status, result = await self._request(session, "POST", "/complete", request_data)
+            end_ns = time.perf_counter_ns()
+            
+            if status == 200:
+                return {
+                    "success": True,
+                    "response_time": (end_ns - start_ns) / 1e9,
+                    "suggestion_length": len(result.get("suggestion", "")),
+                    "tokens": completion_tokens(result),
+                    "confidence": result.get("confidence", 0),
+                    "server_processing_time": result.get("processing_time", 0)
+                }
+            else:
+                return {
+                    "success": False,
+                    "response_time": (end_ns - start_ns) / 1e9,
+                    "error": f"HTTP {status}"
+                }
         except Exception as e:
             return {
                 "success": False,
-                "response_time": time.time() - start_time,
+                "response_time": (time.perf_counter_ns() - start_ns) / 1e9,
                 "error": str(e)
             }
     
+    async def batched_completion_test(self, session: Session,
+                                      requests: List[Dict[str, Any]]) -> Dict[str, Any]:
+        """Send a batch of completion requests to /complete at once
+        
+        Reports each request's latency within the batch and the batch's
+        token throughput over its wall-clock time.
+        """
+        start_ns = time.perf_counter_ns()
+        completions = await asyncio.gather(*[
+            self.single_completion_test(session, request) for request in requests
+        ])
+        wall_time = (time.perf_counter_ns() - start_ns) / 1e9
+        
+        successful = [c for c in completions if c["success"]]
+        if not successful:
+            return {
+                "success": False,
+                "batch_size": len(requests),
+                "response_time": wall_time,
+                "error": completions[0].get("error", "all requests failed")
+            }
+        
+        latencies = [c["response_time"] for c in successful]
+        tokens = sum(c["tokens"] for c in successful)
+        return {
+            "success": True,
+            "batch_size": len(requests),
+            "response_time": wall_time,
+            "completions": len(successful),
+            "tokens": tokens,
+            "throughput": len(successful) / wall_time if wall_time > 0 else 0,
+            "tokens_per_second": tokens / wall_time if wall_time > 0 else 0,
+            "avg_latency": statistics.mean(latencies),
+            "max_latency": max(latencies)
+        }
+    
     async def concurrent_test(self, num_requests: int = 10, 
-                            request_data: Dict[str, Any] = None) -> List[Dict[str, Any]]:
+                            request_data: Dict[str, Any] = None,
+                            session: Optional[Session] = None) -> List[Dict[str, Any]]:
         """Test multiple concurrent requests"""
+        if session is None:
+            async with self._open_session() as session:
+                return await self.concurrent_test(num_requests, request_data, session)
+        
         if not request_data:
             request_data = {
                 "code": "def fibonacci(n):\n    if n <= 1:\n        return n\n    ",
@@ -62,23 +261,35 @@ class HeliosBenchmark:
                 "filename": "test.py"
             }
         
-        async with aiohttp.ClientSession() as session:
-            tasks = [
-                self.single_completion_test(session, request_data)
-                for _ in range(num_requests)
-            ]
-            
-            results = await asyncio.gather(*tasks)
-            return results
+        # Encode the shared request body once for every task
+        payload = _dumps(request_data)
+        tasks = [
+            self.single_completion_test(session, payload)
+            for _ in range(num_requests)
+        ]
+        
+        results = await asyncio.gather(*tasks)
+        return results
     
     async def load_test(self, duration_seconds: int = 60, 
-                       requests_per_second: int = 5) -> Dict[str, Any]:
-        """Run a load test for specified duration"""
+                       requests_per_second: int = 5,
+                       session: Optional[Session] = None,
+                       max_inflight: int = 64) -> Dict[str, Any]:
+        """Run an open-loop load test for specified duration
+        
+        Requests are sent on a fixed schedule whether or not earlier ones
+        have finished, with at most `max_inflight` outstanding at a time.
+        """
+        if session is None:
+            async with self._open_session() as session:
+                return await self.load_test(duration_seconds, requests_per_second, session,
+                                            max_inflight)
+        
         print(f"Running load test: {requests_per_second} req/sec for {duration_seconds}s")
         
-        start_time = time.time()
-        end_time = start_time + duration_seconds
         interval = 1.0 / requests_per_second
+        total_requests = max(1, int(duration_seconds * requests_per_second))
+        semaphore = asyncio.Semaphore(max_inflight)
         
         request_data = {
             "code": "function calculateSum(arr) {\n    let total = 0;\n    ",
@@ -87,103 +298,72 @@ class HeliosBenchmark:
             "filename": "utils.js"
         }
         
-        all_results = []
-        
-        async with aiohttp.ClientSession() as session:
-            while time.time() < end_time:
-                batch_start = time.time()
-                
-                # Send requests for this second
-                tasks = [
-                    self.single_completion_test(session, request_data)
-                    for _ in range(requests_per_second)
-                ]
-                
-                batch_results = await asyncio.gather(*tasks)
-                all_results.extend(batch_results)
-                
-                # Wait for the rest of the second
-                elapsed = time.time() - batch_start
-                if elapsed < 1.0:
-                    await asyncio.sleep(1.0 - elapsed)
-        
-        # Analyze results
-        successful_requests = [r for r in all_results if r.get("success", False)]
-        failed_requests = [r for r in all_results if not r.get("success", False)]
-        
-        if successful_requests:
-            response_times = [r["response_time"] for r in successful_requests]
-            avg_response_time = statistics.mean(response_times)
-            p95_response_time = statistics.quantiles(response_times, n=20)[18] if len(response_times) > 20 else max(response_times)
+        # Encode the request body once for the whole run
+        payload = _dumps(request_data)
+        
+        async def send_one() -> Dict[str, Any]:
+            async with semaphore:
+                return await self.single_completion_test(session, payload)
+        
+        # Each request is dispatched at its own absolute deadline, so slow
+        # responses neither delay later sends nor accumulate drift
+        start_time = time.perf_counter()
+        tasks = []
+        for i in range(total_requests):
+            delay = start_time + i * interval - time.perf_counter()
+            if delay > 0:
+                await asyncio.sleep(delay)
+            tasks.append(asyncio.create_task(send_one()))
+        
+        all_results = await asyncio.gather(*tasks)
+        
+        # Analyze results in one pass; only the p95 needs the full list
+        response_times = []
+        total_response_time = 0.0
+        for result in all_results:
+            if result.get("success", False):
+                response_times.append(result["response_time"])
+                total_response_time += result["response_time"]
+        
+        successful = len(response_times)
+        if successful:
+            avg_response_time = total_response_time / successful
+            p95_response_time = _percentile(response_times, 0.95)
         else:
             avg_response_time = 0
             p95_response_time = 0
         
         return {
             "total_requests": len(all_results),
-            "successful_requests": len(successful_requests),
-            "failed_requests": len(failed_requests),
-            "success_rate": len(successful_requests) / len(all_results) * 100,
+            "successful_requests": successful,
+            "failed_requests": len(all_results) - successful,
+            "success_rate": successful / len(all_results) * 100,
             "avg_response_time": avg_response_time,
             "p95_response_time": p95_response_time,
             "requests_per_second": len(all_results) / duration_seconds,
             "duration": duration_seconds
         }
     
-    def generate_test_cases(self) -> List[Dict[str, Any]]:
-        """Generate various test cases for different scenarios"""
-        test_cases = [
-            {
-                "name": "Python function",
-                "data": {
-                    "code": "def quicksort(arr):\n    if len(arr) <= 1:\n        return arr\n    pivot = arr[len(arr) // 2]\n    ",
-                    "language": "python",
-                    "position": {"line": 4, "character": 4},
-                    "filename": "sorting.py"
-                }
-            },
-            {
-                "name": "JavaScript class",
-                "data": {
-                    "code": "class Calculator {\n    constructor() {\n        this.history = [];\n    }\n    \n    add(a, b) {\n        ",
-                    "language": "javascript",
-                    "position": {"line": 6, "character": 8},
-                    "filename": "calculator.js"
-                }
-            },
-            {
-                "name": "TypeScript interface",
-                "data": {
-                    "code": "interface User {\n    id: number;\n    name: string;\n    email: string;\n}\n\nfunction createUser(userData: Partial<User>): User {\n    ",
-                    "language": "typescript",
-                    "position": {"line": 7, "character": 4},
-                    "filename": "user.ts"
-                }
-            },
-            {
-                "name": "Complex algorithm",
-                "data": {
-                    "code": "def dijkstra(graph, start):\n    distances = {node: float('infinity') for node in graph}\n    distances[start] = 0\n    unvisited = set(graph.keys())\n    \n    while unvisited:\n        ",
-                    "language": "python",
-                    "position": {"line": 6, "character": 8},
-                    "filename": "graph.py"
-                }
-            }
-        ]
-        
-        return test_cases
+    def generate_test_cases(self) -> Tuple[Mapping[str, Any], ...]:
+        """Return the test cases for the different scenarios"""
+        return TEST_CASES
     
     async def run_comprehensive_benchmark(self) -> Dict[str, Any]:
         """Run a comprehensive benchmark suite"""
         print("🚀 Starting Helios Performance Benchmark")
         print("=" * 50)
         
+        # One session is shared by every phase so connections are reused
+        async with self._open_session() as session:
+            return await self._run_benchmark_phases(session)
+    
+    async def _run_benchmark_phases(self, session: Session) -> Dict[str, Any]:
+        """Run the health check and benchmark phases on a shared session"""
         # Test server health
         try:
-            async with aiohttp.ClientSession() as session:
-                async with session.get(f"{self.server_url}/health") as response:
-                    if response.status != 200:
-                        raise Exception(f"Server health check failed: {response.status}")
+            status, _ = await self._request(session, "GET", "/health")
+            if status != 200:
+                raise Exception(f"Server health check failed: {status}")
         except Exception as e:
             print(f"❌ Server not available: {e}")
             return {}
@@ -193,6 +373,7 @@ class HeliosBenchmark:
         results = {
             "test_timestamp": time.time(),
             "server_url": self.server_url,
+            "client": self.client,
             "tests": {}
         }
         
@@ -200,16 +381,21 @@ class HeliosBenchmark:
         print("\n📊 Test 1: Single Request Latency")
         test_cases = self.generate_test_cases()
         
-        for test_case in test_cases:
+        # The cases are independent, so they are sent together
+        single_results = await asyncio.gather(*[
+            self.single_completion_test(session, test_case['payload'])
+            for test_case in test_cases
+        ])
+        
+        for test_case, result in zip(test_cases, single_results):
             print(f"   Testing: {test_case['name']}")
-            result = await self.concurrent_test(1, test_case['data'])
-            if result and result[0].get("success"):
-                print(f"   Response time: {result[0]['response_time']:.3f}s")
-                results["tests"][f"single_{test_case['name'].replace(' ', '_')}"] = result[0]
+            if result.get("success"):
+                print(f"   Response time: {result['response_time']:.3f}s")
+                results["tests"][f"single_{test_case['name'].replace(' ', '_')}"] = result
         
         # Test 2: Concurrent requests
         print("\n📊 Test 2: Concurrent Requests (10 simultaneous)")
-        concurrent_results = await self.concurrent_test(10)
+        concurrent_results = await self.concurrent_test(10, session=session)
         successful = [r for r in concurrent_results if r.get("success", False)]
         
         if successful:
@@ -225,7 +411,8 @@ class HeliosBenchmark:
         
         # Test 3: Load test
         print("\n📊 Test 3: Load Test (30 seconds)")
-        load_results = await self.load_test(duration_seconds=30, requests_per_second=3)
+        load_results = await self.load_test(duration_seconds=30, requests_per_second=3,
+                                          session=session)
         results["tests"]["load_test"] = load_results
         
         print(f"   Total requests: {load_results['total_requests']}")
@@ -233,14 +420,69 @@ class HeliosBenchmark:
         print(f"   Avg response time: {load_results['avg_response_time']:.3f}s")
         print(f"   P95 response time: {load_results['p95_response_time']:.3f}s")
         
+        # Test 4: Batch throughput
+        print("\n📊 Test 4: Batch Throughput")
+        batch_data = [test_case["data"] for test_case in test_cases]
+        batch_results = {}
+        
+        for batch_size in BATCH_SIZES:
+            # The filename is part of the prompt, so a distinct one per request
+            # keeps the server's cache and request coalescing from answering
+            # it with another request's completion
+            batch = []
+            for i in range(batch_size):
+                data = batch_data[i % len(batch_data)]
+                batch.append({**data, "filename": f"b{batch_size}_{i}_{data['filename']}"})
+            result = await self.batched_completion_test(session, batch)
+            if not result["success"]:
+                print(f"   Batch size {batch_size:2d}: failed ({result['error']}), stopping")
+                break
+            
+            batch_results[str(batch_size)] = result
+            print(f"   Batch size {batch_size:2d}: {result['response_time']:.3f}s "
+                  f"({result['tokens_per_second']:.1f} tokens/sec, "
+                  f"{result['throughput']:.1f} completions/sec, "
+                  f"avg latency {result['avg_latency']:.3f}s)")
+        
+        if batch_results:
+            results["tests"]["batch_throughput"] = batch_results
+        
         return results
     
     def save_results(self, results: Dict[str, Any], filename: str = "benchmark_results.json"):
         """Save benchmark results to file"""
-        with open(filename, 'w') as f:
-            json.dump(results, f, indent=2)
+        with open(filename, 'wb') as f:
+            f.write(_dumps_indented(results))
         print(f"\n💾 Results saved to {filename}")
     
+    def plot_batch_throughput(self, results: Dict[str, Any], filename: str):
+        """Plot tokens/sec against batch size from the batch throughput test"""
+        batch_results = results.get("tests", {}).get("batch_throughput")
+        if not batch_results:
+            print("⚠️  No batch throughput results to plot")
+            return
+        
+        # Plotting libraries are slow to import, so load them only when needed
+        import matplotlib.pyplot as plt
+        import seaborn as sns
+        
+        batch_sizes = [int(size) for size in batch_results]
+        throughput = [batch_results[size]["tokens_per_second"] for size in batch_results]
+        
+        sns.set_theme(style="whitegrid")
+        fig, ax = plt.subplots(figsize=(8, 5))
+        ax.plot(batch_sizes, throughput, marker="o")
+        ax.set_xscale("log", base=2)
+        ax.set_xticks(batch_sizes)
+        ax.set_xticklabels([str(size) for size in batch_sizes])
+        ax.set_xlabel("Batch size")
+        ax.set_ylabel("Tokens/sec")
+        ax.set_title("Helios batch throughput")
+        fig.tight_layout()
+        fig.savefig(filename)
+        plt.close(fig)
+        print(f"📉 Batch throughput plot saved to {filename}")
+    
     def generate_report(self, results: Dict[str, Any]):
         """Generate a performance report"""
         if not results:
@@ -284,17 +526,23 @@ async def main():
                        help="Output file for results")
     parser.add_argument("--duration", type=int, default=30,
                        help="Load test duration in seconds")
+    parser.add_argument("--plot",
+                       help="Save a batch throughput plot to this image file")
+    parser.add_argument("--client", choices=CLIENTS, default=CLIENTS[0],
+                       help=f"HTTP client to drive the server with (default: {CLIENTS[0]})")
     
     args = parser.parse_args()
     
-    benchmark = HeliosBenchmark(args.url)
+    benchmark = HeliosBenchmark(args.url, args.client)
     results = await benchmark.run_comprehensive_benchmark()
     
     if results:
         benchmark.save_results(results, args.output)
         benchmark.generate_report(results)
+        if args.plot:
+            benchmark.plot_batch_throughput(results, args.plot)
     else:
         print("❌ Benchmark failed - check server availability")
 
 if __name__ == "__main__":
-    asyncio.run(main())
\ No newline at end of file
+    _run(main())
\ No newline at end of file
@@ -1,49 +1,204 @@
 import ollama
+import httpx
 import asyncio
+import functools
 import logging
+import re
+import socket
 import time
-from typing import Optional, Dict, Any
+from collections import OrderedDict
+from hashlib import blake2b
+from typing import Optional, Dict, Any, AsyncIterator
 from models import CompletionRequest, ServerConfig
 
 logger = logging.getLogger(__name__)
 
+# One keep-alive pool to Ollama shared by every CodeLlamaInference, so a
+# restart keeps its warm connections. Requests are small and latency bound,
+# so Nagle's algorithm is turned off.
+_transport = httpx.AsyncHTTPTransport(
+    limits=httpx.Limits(max_connections=128, max_keepalive_connections=64),
+    socket_options=[(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)]
+)
+_client = ollama.AsyncClient(transport=_transport)
+
+async def close_shared_client():
+    """Close the pooled connections to Ollama"""
+    await _transport.aclose()
+
+# Prompt markup and code fences the model sometimes echoes into completions
+_ARTIFACTS = (
+    '<MID>', '</MID>', '<SUF>', '</SUF>', '<PRE>', '</PRE>',
+    '```python', '```javascript', '```typescript', '```',
+    '<code>', '</code>'
+)
+# All artifacts in one pass; longest first so '```python' wins over '```'
+_ARTIFACT_RE = re.compile('|'.join(map(re.escape, sorted(_ARTIFACTS, key=len, reverse=True))))
+_MAX_ARTIFACT_LEN = max(map(len, _ARTIFACTS))
+# A line holding only whitespace, the end of a completion
+_BLANK_LINE_RE = re.compile(r'\n[^\S\n]*\n')
+
+# Characters of code kept before and after the cursor in a prompt
+PROMPT_CHARS_BEFORE_CURSOR = 4096
+PROMPT_CHARS_AFTER_CURSOR = 1024
+
+def _cursor_offset(code: str, position: Dict[str, int]) -> int:
+    """Offset into code of a {line, character} position, or the end if it has none"""
+    if 'line' not in position:
+        return len(code)
+    
+    offset = 0
+    for _ in range(position['line']):
+        offset = code.find('\n', offset) + 1
+        if not offset:
+            return len(code)
+    return min(offset + position.get('character', 0), len(code))
+
+def _code_window(code: str, position: Dict[str, int]) -> str:
+    """The part of code around the cursor that goes into the prompt"""
+    if len(code) <= PROMPT_CHARS_BEFORE_CURSOR + PROMPT_CHARS_AFTER_CURSOR:
+        return code
+    cursor = _cursor_offset(code, position)
+    return code[max(0, cursor - PROMPT_CHARS_BEFORE_CURSOR):cursor + PROMPT_CHARS_AFTER_CURSOR]
+
+@functools.lru_cache(maxsize=1024)
+def _prompt_header(filename: str) -> str:
+    """Infilling prompt header for a file, built once per filename"""
+    return f"<PRE> {filename}\n"
+
+def _is_partial_artifact(text: str) -> bool:
+    """Whether text is the start of a longer artifact"""
+    return any(len(a) > len(text) and a.startswith(text) for a in _ARTIFACTS)
+
+class _StreamCleaner:
+    """Incremental form of CodeLlamaInference._post_process_completion
+    
+    Chunks are fed as they stream in and cleaned text is returned as soon
+    as it is final. Text that may be the start of an artifact split across
+    chunks, and trailing whitespace, are held back until the next chunk.
+    """
+    
+    def __init__(self):
+        self._pending = ""
+        self._whitespace = ""
+        self._started = False
+        self.done = False
+    
+    def feed(self, chunk: str) -> str:
+        """Add a streamed chunk, returning the text that can be emitted"""
+        text = self._pending + chunk
+        
+        # Hold back a tail that could still grow into an artifact, splitting
+        # only between artifact matches so the regex sees each one whole
+        split = len(text)
+        resume = 0
+        for match in _ARTIFACT_RE.finditer(text):
+            if _is_partial_artifact(text[match.start():]):
+                split = match.start()
+                break
+            resume = match.end()
+        else:
+            for i in range(max(resume, len(text) - _MAX_ARTIFACT_LEN + 1), len(text)):
+                if _is_partial_artifact(text[i:]):
+                    split = i
+                    break
+        self._pending = text[split:]
+        return self._clean(text[:split])
+    
+    def flush(self) -> str:
+        """Return whatever is still held back once the stream has ended"""
+        text, self._pending = self._pending, ""
+        text = self._clean(text)
+        self._whitespace = ""
+        return text
+    
+    def _clean(self, text: str) -> str:
+        if self.done:
+            return ""
+        
+        text = _ARTIFACT_RE.sub('', text)
+        
+        if not self._started:
+            text = text.lstrip()
+            self._started = bool(text)
+        
+        text = self._whitespace + text
+        body = text.rstrip()
+        self._whitespace = text[len(body):]
+        
+        # Stop at the first blank line after content
+        gap = _BLANK_LINE_RE.search(text)
+        if gap:
+            self.done = True
+            return text[:gap.start()].rstrip()
+        return body
+
 class CodeLlamaInference:
     def __init__(self, config: ServerConfig):
         self.config = config
         self.model_name = config.model_name
-        self.client = ollama.AsyncClient()
+        self.client = _client
         self.model_loaded = False
+        # Set once the model is loaded, so requests can wait for it briefly
+        self._ready = asyncio.Event()
+        # Caps generations in flight at Ollama; the rest wait their turn here
+        self._generation_slots = asyncio.Semaphore(config.max_concurrent_generations)
+        # Recent completions keyed by a digest of the prompt and sampling options
+        self._cache: "OrderedDict[bytes, str]" = OrderedDict()
+        # Futures for generations in progress, so identical concurrent
+        # requests share one call to the model
+        self._inflight: Dict[bytes, asyncio.Future] = {}
+        self._warmup_task: Optional[asyncio.Task] = None
         
     async def initialize(self) -> bool:
         """Initialize the model and check if it's available"""
         try:
-            # Check if model exists locally
-            models = await self.client.list()
-            model_names = [model['name'] for model in models['models']]
-            
-            if self.model_name not in model_names:
+            # Check if model exists locally; show() looks up just this model
+            # instead of listing the whole catalog
+            try:
+                await self.client.show(self.model_name)
+            except ollama.ResponseError as e:
+                if e.status_code != 404:
+                    raise
                 logger.info(f"Model {self.model_name} not found locally. Pulling...")
                 await self.pull_model()
-            
-            # Test the model with a simple prompt
-            test_response = await self.client.generate(
-                model=self.model_name,
-                prompt="def hello():",
-                options={
-                    'num_predict': 10,
-                    'temperature': 0.1
-                }
-            )
+                # Fails with a 404 if the pull did not produce the model
+                await self.client.show(self.model_name)
             
             self.model_loaded = True
+            self._ready.set()
             logger.info(f"Model {self.model_name} loaded successfully")
+            
+            if self.config.warmup:
+                self._warmup_task = asyncio.create_task(self._warmup())
             return True
             
         except Exception as e:
             logger.error(f"Failed to initialize model: {e}")
             self.model_loaded = False
+            self._ready.clear()
             return False
     
+    async def _warmup(self):
+        """Generate a few tokens so Ollama loads the weights before the first request"""
+        try:
+            await self._generate_limited("def hello():", {'num_predict': 10, 'temperature': 0.1})
+            logger.info(f"Model {self.model_name} warmed up")
+        except Exception as e:
+            logger.warning(f"Model warmup failed: {e}")
+    
+    async def reload(self, model_name: Optional[str] = None) -> bool:
+        """Re-probe the model, optionally switching to model_name
+        
+        The Ollama connection pool and completion cache are kept; cache
+        entries are keyed by model, so a different model never sees them.
+        """
+        self.model_loaded = False
+        self._ready.clear()
+        if model_name:
+            self.model_name = model_name
+        return await self.initialize()
+    
     async def pull_model(self) -> bool:
         """Pull the model from Ollama registry"""
         try:
@@ -60,29 +215,48 @@ class CodeLlamaInference:
         if not self.model_loaded:
             raise RuntimeError("Model not loaded")
         
-        start_time = time.time()
+        start_time = time.perf_counter()
         
         try:
             # Prepare the prompt with context
             prompt = self._prepare_prompt(request)
+            options = self._generation_options(request)
+            
+            # Editors re-request the same prefix often, so serve repeats from the cache
+            key = self._prompt_key(prompt, options)
+            cached = self._cache_get(key)
+            if cached is not None:
+                return cached, time.perf_counter() - start_time
             
-            # Generate completion
-            response = await self.client.generate(
-                model=self.model_name,
-                prompt=prompt,
-                options={
-                    'num_predict': request.max_tokens or self.config.max_tokens,
-                    'temperature': request.temperature or self.config.temperature,
-                    'top_p': 0.9,
-                    'stop': ['\n\n', '```', '</code>']  # Stop tokens
-                }
-            )
+            # Join an identical generation already in progress, unless its
+            # request is cancelled first
+            pending = self._inflight.get(key)
+            if pending is not None:
+                try:
+                    return await asyncio.shield(pending), time.perf_counter() - start_time
+                except asyncio.CancelledError:
+                    if not pending.cancelled():
+                        raise
             
-            completion = response['response'].strip()
-            processing_time = time.time() - start_time
+            future = asyncio.get_running_loop().create_future()
+            self._inflight[key] = future
+            try:
+                completion = await self._generate(request, prompt, options)
+            except asyncio.CancelledError:
+                future.cancel()
+                raise
+            except Exception as e:
+                future.set_exception(e)
+                future.exception()  # Retrieved here in case nobody joined
+                raise
+            else:
+                future.set_result(completion)
+            finally:
+                if self._inflight.get(key) is future:
+                    del self._inflight[key]
             
-            # Post-process the completion
-            completion = self._post_process_completion(completion, request)
+            self._cache_put(key, completion)
+            processing_time = time.perf_counter() - start_time
             
             logger.debug(f"Generated completion in {processing_time:.2f}s: {completion[:50]}...")
             
@@ -92,17 +266,107 @@ class CodeLlamaInference:
             logger.error(f"Failed to generate completion: {e}")
             raise
     
-    def _prepare_prompt(self, request: CompletionRequest) -> str:
-        """Prepare the prompt for code completion"""
-        language = request.language
-        code = request.code
-        filename = request.filename
+    async def _generate(self, request: CompletionRequest, prompt: str,
+                        options: Dict[str, Any]) -> str:
+        """Run a generation once a slot is free and post-process it"""
+        response = await self._generate_limited(prompt, options)
+        return self._post_process_completion(response['response'].strip(), request)
+    
+    async def generate_completion_stream(self, request: CompletionRequest) -> AsyncIterator[str]:
+        """Generate a code completion, yielding cleaned text as it is decoded
         
-        # Create a context-aware prompt
-        prompt = f"""<PRE> {filename}
-{code}<SUF><MID>"""
+        Closing the generator early closes the stream to Ollama, which stops
+        the generation.
+        """
+        if not self.model_loaded:
+            raise RuntimeError("Model not loaded")
+        
+        prompt = self._prepare_prompt(request)
+        options = self._generation_options(request)
+        cache_key = self._prompt_key(prompt, options)
+        cached = self._cache_get(cache_key)
+        if cached is not None:
+            yield cached
+            return
         
-        return prompt
+        cleaner = _StreamCleaner()
+        pieces = []
+        async with self._generation_slots:
+            stream = await self.client.generate(model=self.model_name, prompt=prompt,
+                                                options=options, stream=True)
+            try:
+                async for chunk in stream:
+                    piece = cleaner.feed(chunk['response'])
+                    if piece:
+                        pieces.append(piece)
+                        yield piece
+                    if cleaner.done or chunk.get('done'):
+                        break
+                
+                piece = cleaner.flush()
+                if piece:
+                    pieces.append(piece)
+                    yield piece
+            finally:
+                await stream.aclose()
+        
+        self._cache_put(cache_key, ''.join(pieces))
+    
+    def _generation_options(self, request: CompletionRequest) -> Dict[str, Any]:
+        """Ollama sampling options for a request"""
+        return {
+            'num_predict': request.max_tokens or self.config.max_tokens,
+            'temperature': request.temperature or self.config.temperature,
+            'top_p': 0.9,
+            'stop': ['\n\n', '```', '</code>']  # Stop tokens
+        }
+    
+    async def _generate_limited(self, prompt: str, options: Dict[str, Any]) -> Dict[str, Any]:
+        """Call Ollama once a generation slot is free"""
+        async with self._generation_slots:
+            return await self.client.generate(model=self.model_name, prompt=prompt,
+                                              options=options)
+    
+    async def close(self):
+        """Stop any warmup still running"""
+        if self._warmup_task is not None:
+            self._warmup_task.cancel()
+            try:
+                await self._warmup_task
+            except asyncio.CancelledError:
+                pass
+            self._warmup_task = None
+    
+    def _prompt_key(self, prompt: str, options: Dict[str, Any]) -> bytes:
+        """Digest of everything that determines a completion"""
+        key = f"{self.model_name}\0{options['num_predict']}\0{options['temperature']}\0{prompt}"
+        return blake2b(key.encode('utf-8'), digest_size=16).digest()
+    
+    def _cache_get(self, key: bytes) -> Optional[str]:
+        """Look up a cached completion, marking it as recently used"""
+        if not self.config.cache_enabled:
+            return None
+        completion = self._cache.get(key)
+        if completion is not None:
+            self._cache.move_to_end(key)
+        return completion
+    
+    def _cache_put(self, key: bytes, completion: str):
+        """Cache a completion, evicting the least recently used beyond cache_size"""
+        if not self.config.cache_enabled:
+            return
+        self._cache[key] = completion
+        if len(self._cache) > self.config.cache_size:
+            self._cache.popitem(last=False)
+    
+    def _prepare_prompt(self, request: CompletionRequest) -> str:
+        """Prepare the prompt for code completion"""
+        # Create a context-aware prompt. The header is identical for every
+        # request from a file, which keeps the prompt prefix stable for
+        # Ollama's prefix cache. Large files are cut to a window around the
+        # cursor so tokenization cost stays bounded.
+        code = _code_window(request.code, request.position)
+        return f"{_prompt_header(request.filename)}{code}<SUF><MID>"
     
     def _post_process_completion(self, completion: str, request: CompletionRequest) -> str:
         """Clean up the generated completion"""
@@ -110,27 +374,24 @@ class CodeLlamaInference:
         completion = completion.strip()
         
         # Remove common artifacts
-        artifacts = [
-            '<MID>', '</MID>', '<SUF>', '</SUF>', '<PRE>', '</PRE>',
-            '```python', '```javascript', '```typescript', '```',
-            '<code>', '</code>'
-        ]
+        completion = _ARTIFACT_RE.sub('', completion)
         
-        for artifact in artifacts:
-            completion = completion.replace(artifact, '')
-        
-        # Clean up extra whitespace
-        lines = completion.split('\n')
-        cleaned_lines = []
-        
-        for line in lines:
-            if line.strip():  # Keep non-empty lines
-                cleaned_lines.append(line)
-            elif cleaned_lines and cleaned_lines[-1].strip():  # Keep first empty line after content
-                cleaned_lines.append('')
-                break  # Stop at first significant gap
-        
-        return '\n'.join(cleaned_lines).strip()
+        # Keep everything before the first blank line, found in a single
+        # scan instead of splitting into lines
+        completion = completion.strip()
+        gap = _BLANK_LINE_RE.search(completion)
+        if gap:
+            completion = completion[:gap.start()].rstrip()
+        return completion
+    
+    async def wait_until_loaded(self, timeout: float) -> bool:
+        """Wait up to timeout seconds for the model to load, returning whether it has"""
+        if not self.model_loaded:
+            try:
+                await asyncio.wait_for(self._ready.wait(), timeout)
+            except asyncio.TimeoutError:
+                pass
+        return self.model_loaded
     
     def is_model_loaded(self) -> bool:
         """Check if model is loaded and ready"""
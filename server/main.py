@@ -1,13 +1,18 @@
-from fastapi import FastAPI, HTTPException, BackgroundTasks
+from fastapi import FastAPI, APIRouter, HTTPException, BackgroundTasks, Request
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import ORJSONResponse, Response, StreamingResponse
 import uvicorn
+import json
 import logging
+import math
 import time
 import asyncio
 from contextlib import asynccontextmanager
+from datetime import datetime, timezone
 
 from models import CompletionRequest, CompletionResponse, HealthResponse, ServerConfig
-from inference import CodeLlamaInference
+from inference import CodeLlamaInference, close_shared_client
+from model_manager import ModelManager
 
 # Configure logging
 logging.basicConfig(level=logging.INFO)
@@ -16,7 +21,36 @@ logger = logging.getLogger(__name__)
 # Global variables
 config = ServerConfig()
 inference_engine: CodeLlamaInference = None
-start_time = time.time()
+model_manager = ModelManager()
+# Uptime is measured on the monotonic clock; the wall-clock start is for display
+start_time = time.monotonic()
+started_at = datetime.now(timezone.utc).isoformat()
+
+# Seconds /complete waits for a model that is still loading before a 503,
+# and the longest /health?wait_ready=true waits
+READY_GRACE_PERIOD = 0.5
+READY_WAIT_TIMEOUT = 30.0
+
+# Seconds between checks for a client that has abandoned its /complete request
+DISCONNECT_POLL_INTERVAL = 0.05
+
+# Serialized /health responses are reused for HEALTH_CACHE_TTL seconds, as
+# (monotonic time, model_loaded, JSON body)
+HEALTH_CACHE_TTL = 1.0
+_health_cache = (float("-inf"), False, b"")
+
+# Confidence is capped here, and either term alone reaches the cap beyond
+# these bounds
+MAX_CONFIDENCE = 0.95
+_CAPPED_LENGTH = math.ceil(MAX_CONFIDENCE / 0.8 * 100)
+_CAPPED_TIME = 0.2 / MAX_CONFIDENCE
+
+def completion_confidence(length: int, processing_time: float) -> float:
+    """Confidence score from a completion's length and how quickly it came back"""
+    # Long or fast completions, including cache hits, are capped without the arithmetic
+    if length >= _CAPPED_LENGTH or processing_time <= _CAPPED_TIME:
+        return MAX_CONFIDENCE
+    return min(MAX_CONFIDENCE, length / 100.0 * 0.8 + (1.0 / max(processing_time, 0.1)) * 0.2)
 
 @asynccontextmanager
 async def lifespan(app: FastAPI):
@@ -27,13 +61,22 @@ async def lifespan(app: FastAPI):
     logger.info("Starting Helios Inference Server...")
     inference_engine = CodeLlamaInference(config)
     
-    # Initialize model in background
-    asyncio.create_task(initialize_model())
+    # Initialize model in background; keeping the task on app.state stops it
+    # being garbage collected mid-run
+    app.state.init_task = asyncio.create_task(initialize_model())
     
     yield
     
     # Shutdown
     logger.info("Shutting down Helios Inference Server...")
+    app.state.init_task.cancel()
+    try:
+        await app.state.init_task
+    except asyncio.CancelledError:
+        pass
+    if inference_engine:
+        await inference_engine.close()
+    await close_shared_client()
 
 async def initialize_model():
     """Initialize the model asynchronously"""
@@ -52,7 +95,9 @@ app = FastAPI(
     title="Helios Inference Server",
     description="Local CodeLlama inference server for VS Code extension",
     version="0.1.0",
-    lifespan=lifespan
+    lifespan=lifespan,
+    # orjson encodes responses several times faster than the stdlib encoder
+    default_response_class=ORJSONResponse
 )
 
 # Add CORS middleware
@@ -65,42 +110,118 @@ app.add_middleware(
 )
 
 @app.get("/health", response_model=HealthResponse)
-async def health_check():
-    """Health check endpoint"""
-    uptime = time.time() - start_time
+async def health_check(wait_ready: bool = False):
+    """Health check endpoint
+    
+    With wait_ready, the response is held until the model has loaded or
+    READY_WAIT_TIMEOUT has passed.
+    """
+    global _health_cache
+    
+    model_loaded = False
+    if inference_engine:
+        if wait_ready:
+            model_loaded = await inference_engine.wait_until_loaded(READY_WAIT_TIMEOUT)
+        else:
+            model_loaded = inference_engine.is_model_loaded()
     
-    return HealthResponse(
-        status="healthy",
-        model_loaded=inference_engine.is_model_loaded() if inference_engine else False,
-        server_version="0.1.0",
-        uptime=uptime
-    )
+    # Clients poll this often, so the body is rebuilt at most once per TTL
+    # or when the model state changes
+    now = time.monotonic()
+    cached_at, cached_loaded, body = _health_cache
+    if now - cached_at >= HEALTH_CACHE_TTL or cached_loaded != model_loaded:
+        body = HealthResponse(
+            status="healthy",
+            model_loaded=model_loaded,
+            server_version="0.1.0",
+            uptime=time.monotonic() - start_time
+        ).model_dump_json().encode()
+        _health_cache = (now, model_loaded, body)
+    
+    return Response(content=body, media_type="application/json")
+
+class ClientDisconnected(Exception):
+    """The client went away before its response was ready"""
+
+async def until_disconnected(http_request: Request, awaitable):
+    """Await awaitable, cancelling it and raising ClientDisconnected if the client leaves"""
+    task = asyncio.ensure_future(awaitable)
+    try:
+        while True:
+            done, _ = await asyncio.wait({task}, timeout=DISCONNECT_POLL_INTERVAL)
+            if done:
+                return task.result()
+            if await http_request.is_disconnected():
+                raise ClientDisconnected()
+    finally:
+        task.cancel()
 
 @app.post("/complete", response_model=CompletionResponse)
-async def get_completion(request: CompletionRequest):
-    """Generate code completion"""
+async def get_completion(request: CompletionRequest, http_request: Request):
+    """Generate code completion
+    
+    An editor typically abandons a request on the next keystroke; the
+    generation is then cancelled so the model stops decoding for it.
+    """
     if not inference_engine:
         raise HTTPException(status_code=503, detail="Inference engine not initialized")
     
-    if not inference_engine.is_model_loaded():
+    # A model that is just finishing loading gets a moment before the 503
+    if not await inference_engine.wait_until_loaded(READY_GRACE_PERIOD):
         raise HTTPException(status_code=503, detail="Model not loaded")
     
     try:
-        completion, processing_time = await inference_engine.generate_completion(request)
+        completion, processing_time = await until_disconnected(
+            http_request, inference_engine.generate_completion(request)
+        )
         
-        # Calculate confidence based on completion length and processing time
-        confidence = min(0.95, len(completion) / 100.0 * 0.8 + (1.0 / max(processing_time, 0.1)) * 0.2)
+        confidence = completion_confidence(len(completion), processing_time)
         
-        return CompletionResponse(
+        # Serialized by pydantic-core directly; returning the model would have
+        # FastAPI validate it again against response_model before encoding
+        body = CompletionResponse(
             suggestion=completion,
             confidence=confidence,
             processing_time=processing_time
-        )
+        ).model_dump_json()
+        return Response(content=body, media_type="application/json")
         
+    except ClientDisconnected:
+        # 499 "client closed request"; nobody is left to read it
+        return Response(status_code=499)
     except Exception as e:
         logger.error(f"Error generating completion: {e}")
         raise HTTPException(status_code=500, detail=f"Failed to generate completion: {str(e)}")
 
+@app.post("/complete/stream")
+async def stream_completion(request: CompletionRequest):
+    """Stream a code completion as Server-Sent Events
+    
+    Each event carries a {"text": ...} piece of the suggestion; a final
+    "done" event reports the processing time.
+    """
+    if not inference_engine:
+        raise HTTPException(status_code=503, detail="Inference engine not initialized")
+    
+    if not await inference_engine.wait_until_loaded(READY_GRACE_PERIOD):
+        raise HTTPException(status_code=503, detail="Model not loaded")
+    
+    async def events():
+        start = time.perf_counter()
+        completion = inference_engine.generate_completion_stream(request)
+        try:
+            async for piece in completion:
+                yield f"data: {json.dumps({'text': piece})}\n\n"
+            yield f"event: done\ndata: {json.dumps({'processing_time': time.perf_counter() - start})}\n\n"
+        except Exception as e:
+            logger.error(f"Error streaming completion: {e}")
+            yield f"event: error\ndata: {json.dumps({'detail': str(e)})}\n\n"
+        finally:
+            # Also runs when the client disconnects, which stops decoding
+            await completion.aclose()
+    
+    return StreamingResponse(events(), media_type="text/event-stream")
+
 @app.post("/restart")
 async def restart_server(background_tasks: BackgroundTasks):
     """Restart the inference server"""
@@ -112,9 +233,17 @@ async def restart_model():
     global inference_engine
     try:
         logger.info("Restarting model...")
-        inference_engine = CodeLlamaInference(config)
-        await inference_engine.initialize()
-        logger.info("Model restarted successfully")
+        # The engine is reused so its connections and caches stay warm
+        if inference_engine:
+            success = await inference_engine.reload(config.model_name)
+        else:
+            inference_engine = CodeLlamaInference(config)
+            success = await inference_engine.initialize()
+        
+        if success:
+            logger.info("Model restarted successfully")
+        else:
+            logger.error("Failed to restart model")
     except Exception as e:
         logger.error(f"Error restarting model: {e}")
 
@@ -125,7 +254,8 @@ async def get_status():
         "server_status": "running",
         "model_loaded": inference_engine.is_model_loaded() if inference_engine else False,
         "model_name": config.model_name,
-        "uptime": time.time() - start_time,
+        "uptime": time.monotonic() - start_time,
+        "started_at": started_at,
         "config": {
             "max_tokens": config.max_tokens,
             "temperature": config.temperature,
@@ -134,12 +264,38 @@ async def get_status():
         }
     }
 
+# Model management, using ModelManager's async methods so ollama
+# subprocesses never block completion requests
+models_router = APIRouter(prefix="/models")
+
+@models_router.get("")
+async def list_models():
+    """List the supported models and the ones installed locally"""
+    return {
+        "available": model_manager.available_models,
+        "installed": await model_manager.list_installed_models_async()
+    }
+
+@models_router.get("/{model_name}")
+async def get_model(model_name: str):
+    """Get details of an installed model"""
+    info = await model_manager.get_model_info_async(model_name)
+    if info is None:
+        raise HTTPException(status_code=404, detail=f"Model '{model_name}' not found or not installed")
+    return info
+
+app.include_router(models_router)
+
 if __name__ == "__main__":
     logger.info(f"Starting server on {config.host}:{config.port}")
+    # "auto" picks uvloop and httptools when they are installed
     uvicorn.run(
         "main:app",
         host=config.host,
         port=config.port,
-        reload=config.debug,
+        workers=config.workers,
+        loop="auto",
+        http="auto",
+        reload=config.debug and config.workers == 1,
         log_level="info"
     )
\ No newline at end of file
@@ -6,14 +6,25 @@ Handles downloading, caching, and switching between different CodeLlama models
 
 import os
 import sys
+import asyncio
 import subprocess
 import json
 import time
-from typing import List, Dict, Optional
+from typing import List, Dict, Optional, Tuple, FrozenSet
 from pathlib import Path
 
+# Seconds a parsed `ollama list` stays valid for membership checks
+INSTALLED_CACHE_TTL = 5.0
+
+def parse_model_list(output: str) -> List[str]:
+    """Extract the model names from `ollama list` output"""
+    lines = output.strip().split('\n')[1:]  # Skip header
+    return [line.split()[0] for line in lines if line.strip()]
+
 class ModelManager:
     def __init__(self):
+        # (monotonic time, installed CodeLlama models) from the last listing
+        self._installed_cache: Optional[Tuple[float, FrozenSet[str]]] = None
         self.available_models = {
             "codellama:7b-code": {
                 "size": "~4GB",
@@ -48,22 +59,34 @@ class ModelManager:
             print(f"   Description: {info['description']}")
             print(f"   Recommended RAM: {info['recommended_ram']}")
     
+    def _parse_installed(self, output: str) -> List[str]:
+        """Extract CodeLlama model names from `ollama list` output and cache them"""
+        installed = [name for name in parse_model_list(output) if name.startswith('codellama')]
+        self._installed_cache = (time.monotonic(), frozenset(installed))
+        return installed
+    
+    def _cached_installed(self) -> Optional[FrozenSet[str]]:
+        """The installed models from a recent listing, if still fresh"""
+        if self._installed_cache is None:
+            return None
+        listed_at, installed = self._installed_cache
+        if time.monotonic() - listed_at > INSTALLED_CACHE_TTL:
+            return None
+        return installed
+    
+    def installed_models(self) -> FrozenSet[str]:
+        """Set of installed models, listed at most once per INSTALLED_CACHE_TTL"""
+        installed = self._cached_installed()
+        if installed is None:
+            installed = frozenset(self.list_installed_models())
+        return installed
+    
     def list_installed_models(self) -> List[str]:
         """Get list of locally installed models"""
         try:
             result = subprocess.run(['ollama', 'list'], 
                                   capture_output=True, text=True, check=True)
-            
-            installed = []
-            lines = result.stdout.strip().split('\n')[1:]  # Skip header
-            
-            for line in lines:
-                if line.strip():
-                    model_name = line.split()[0]
-                    if model_name.startswith('codellama'):
-                        installed.append(model_name)
-            
-            return installed
+            return self._parse_installed(result.stdout)
             
         except subprocess.CalledProcessError:
             print("❌ Error: Could not list models. Is Ollama running?")
@@ -93,6 +116,7 @@ class ModelManager:
             
             process.wait()
             
+            self._installed_cache = None
             if process.returncode == 0:
                 print(f"✅ Successfully installed {model_name}")
                 return True
@@ -106,14 +130,13 @@ class ModelManager:
     
     def remove_model(self, model_name: str) -> bool:
         """Remove a locally installed model"""
-        installed = self.list_installed_models()
-        
-        if model_name not in installed:
+        if model_name not in self.installed_models():
             print(f"❌ Model '{model_name}' is not installed")
             return False
         
         try:
             subprocess.run(['ollama', 'rm', model_name], check=True)
+            self._installed_cache = None
             print(f"✅ Successfully removed {model_name}")
             return True
         except subprocess.CalledProcessError:
@@ -164,6 +187,48 @@ class ModelManager:
             print("❌ Model test failed - execution error")
             return False
 
+    # Async variants for use inside the server's event loop. They run the
+    # same ollama commands as subprocesses without blocking the loop and
+    # report failures through their return values instead of printing.
+    
+    async def _run_ollama(self, *args: str) -> Tuple[int, str]:
+        """Run an ollama command, returning its exit code and standard output"""
+        try:
+            process = await asyncio.create_subprocess_exec(
+                'ollama', *args,
+                stdout=asyncio.subprocess.PIPE,
+                stderr=asyncio.subprocess.DEVNULL
+            )
+        except FileNotFoundError:
+            return 127, ""
+        
+        stdout, _ = await process.communicate()
+        return process.returncode, stdout.decode(errors='replace')
+    
+    async def list_installed_models_async(self) -> List[str]:
+        """Get list of locally installed models without blocking the event loop"""
+        returncode, output = await self._run_ollama('list')
+        return self._parse_installed(output) if returncode == 0 else []
+    
+    async def installed_models_async(self) -> FrozenSet[str]:
+        """Set of installed models, listed at most once per INSTALLED_CACHE_TTL"""
+        installed = self._cached_installed()
+        if installed is None:
+            installed = frozenset(await self.list_installed_models_async())
+        return installed
+    
+    async def get_model_info_async(self, model_name: str) -> Optional[Dict]:
+        """Get detailed information about a model without blocking the event loop"""
+        returncode, output = await self._run_ollama('show', model_name)
+        if returncode != 0:
+            return None
+        
+        return {
+            "name": model_name,
+            "status": "installed",
+            "details": output
+        }
+
 def main():
     manager = ModelManager()
     
@@ -1,9 +1,12 @@
-from pydantic import BaseModel
+from pydantic import BaseModel, Field
 from typing import Optional, Dict, Any
 from dataclasses import dataclass
 
+# Largest code payload accepted; bigger requests are rejected with a 422
+MAX_CODE_LENGTH = 128 * 1024
+
 class CompletionRequest(BaseModel):
-    code: str
+    code: str = Field(..., max_length=MAX_CODE_LENGTH)
     language: str
     position: Dict[str, int]  # {line: int, character: int}
     filename: str
@@ -28,4 +31,16 @@ class ServerConfig:
     model_name: str = "codellama:7b-code"
     max_tokens: int = 100
     temperature: float = 0.1
-    debug: bool = False
\ No newline at end of file
+    debug: bool = False
+    # Each uvicorn worker is a separate process with its own inference
+    # engine and cache
+    workers: int = 1
+    # Identical prompts are served from an in-process LRU cache
+    cache_enabled: bool = True
+    cache_size: int = 256
+    # Generations Ollama runs at once; more contend for memory bandwidth and
+    # slow each other down. Match the backend's parallel decode slots.
+    max_concurrent_generations: int = 2
+    # Run a short generation after startup so the first completion does not
+    # pay for loading the weights; readiness does not wait for it
+    warmup: bool = False
\ No newline at end of file
@@ -7,6 +7,8 @@ import sys
 import os
 import logging
 
+from model_manager import parse_model_list
+
 def check_ollama_installed():
     """Check if Ollama is installed"""
     try:
@@ -72,8 +74,9 @@ def main():
     print(f"Checking for model {model_name}...")
     
     try:
-        result = subprocess.run(['ollama', 'list'], capture_output=True, text=True)
-        if model_name not in result.stdout:
+        result = subprocess.run(['ollama', 'list'], capture_output=True, text=True, check=True)
+        # Compare whole names; a substring test would match e.g. codellama:7b-code-q4
+        if model_name not in parse_model_list(result.stdout):
             if not pull_model(model_name):
                 print("Warning: Failed to pull model. Server may not work properly.")
         else:
@@ -1,10 +1,30 @@
 import pytest
 import asyncio
+import json
+from types import SimpleNamespace
 from fastapi.testclient import TestClient
+import main
 from main import app
+from inference import CodeLlamaInference
+from models import CompletionRequest, ServerConfig
 
 client = TestClient(app)
 
+COMPLETION_REQUEST = {
+    "code": "def hello():",
+    "language": "python",
+    "position": {"line": 0, "character": 12},
+    "filename": "test.py"
+}
+
+def make_engine(generate, **config):
+    """A loaded inference engine whose Ollama client calls generate(**kwargs)"""
+    engine = CodeLlamaInference(ServerConfig(**config))
+    engine.client = SimpleNamespace(generate=generate)
+    engine.model_loaded = True
+    engine._ready.set()
+    return engine
+
 def test_health_endpoint():
     """Test the health check endpoint"""
     response = client.get("/health")
@@ -41,4 +61,102 @@ def test_restart_endpoint():
     response = client.post("/restart")
     assert response.status_code == 200
     data = response.json()
-    assert "message" in data
\ No newline at end of file
+    assert "message" in data
+
+def test_completion_cache_reuses_identical_prompts():
+    """Repeated prompts are served from the cache without calling the model"""
+    calls = []
+    
+    async def generate(**kwargs):
+        calls.append(kwargs)
+        return {"response": "return 'hello'"}
+    
+    engine = make_engine(generate)
+    request = CompletionRequest(**COMPLETION_REQUEST)
+    first, _ = asyncio.run(engine.generate_completion(request))
+    second, _ = asyncio.run(engine.generate_completion(request))
+    
+    assert first == second == "return 'hello'"
+    assert len(calls) == 1
+
+def test_identical_concurrent_completions_share_one_generation():
+    """Concurrent identical prompts wait on a single model call"""
+    calls = []
+    
+    async def generate(**kwargs):
+        calls.append(kwargs)
+        await asyncio.sleep(0.05)
+        return {"response": "pass"}
+    
+    engine = make_engine(generate, cache_enabled=False)
+    request = CompletionRequest(**COMPLETION_REQUEST)
+    
+    async def complete_concurrently():
+        return await asyncio.gather(*[engine.generate_completion(request) for _ in range(4)])
+    
+    results = asyncio.run(complete_concurrently())
+    
+    assert [completion for completion, _ in results] == ["pass"] * 4
+    assert len(calls) == 1
+
+def test_stream_endpoint_sends_cleaned_pieces_then_done(monkeypatch):
+    """/complete/stream sends the cleaned completion as SSE text events and a done event"""
+    async def generate(**kwargs):
+        assert kwargs["stream"] is True
+        
+        async def chunks():
+            for piece in ["    return", " 'hello'", "\n\nprint()"]:
+                yield {"response": piece, "done": False}
+        return chunks()
+    
+    monkeypatch.setattr(main, "inference_engine", make_engine(generate))
+    response = client.post("/complete/stream", json=COMPLETION_REQUEST)
+    
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("text/event-stream")
+    events = response.text.strip().split("\n\n")
+    text = "".join(json.loads(event[len("data: "):])["text"]
+                   for event in events if event.startswith("data: "))
+    assert text == "return 'hello'"
+    assert events[-1].startswith("event: done\n")
+
+def test_completion_cancelled_when_client_disconnects(monkeypatch):
+    """A client that leaves gets a 499 and its generation is cancelled"""
+    cancelled = []
+    
+    async def generate(**kwargs):
+        try:
+            await asyncio.sleep(10)
+        except asyncio.CancelledError:
+            cancelled.append(True)
+            raise
+    
+    async def is_disconnected():
+        return True
+    
+    monkeypatch.setattr(main, "inference_engine", make_engine(generate))
+    http_request = SimpleNamespace(is_disconnected=is_disconnected)
+    
+    async def complete_and_settle():
+        response = await main.get_completion(CompletionRequest(**COMPLETION_REQUEST), http_request)
+        # Let the cancelled generation unwind
+        await asyncio.sleep(0.01)
+        return response
+    
+    response = asyncio.run(complete_and_settle())
+    
+    assert response.status_code == 499
+    assert cancelled == [True]
+
+def test_health_body_cached_until_model_state_changes(monkeypatch):
+    """/health reuses its body within the TTL but not across a model state change"""
+    monkeypatch.setattr(main, "_health_cache", (float("-inf"), False, b""))
+    monkeypatch.setattr(main, "inference_engine", None)
+    
+    first = client.get("/health").json()
+    second = client.get("/health").json()
+    assert second == first
+    assert first["model_loaded"] is False
+    
+    monkeypatch.setattr(main, "inference_engine", make_engine(None))
+    assert client.get("/health").json()["model_loaded"] is True
@@ -0,0 +1,58 @@
+import io
+import os
+import tarfile
+import pytest
+import backup
+from backup import _BackupTarFile
+
+# Sizes around the tar block boundary, plus one spanning several sendfile calls
+FILE_SIZES = [0, 1, 511, 512, 513, 70000]
+
+def write_archive(tmp_path):
+    """Archive one file per FILE_SIZES entry plus an in-memory member, uncompressed"""
+    contents = {}
+    for size in FILE_SIZES:
+        path = tmp_path / f"file_{size}.bin"
+        path.write_bytes(os.urandom(size))
+        contents[path.name] = path.read_bytes()
+
+    archive = tmp_path / "backup.tar"
+    with open(archive, "wb") as f, _BackupTarFile.open(fileobj=f, mode="w|") as tar:
+        data = b'{"backup_name": "test"}'
+        tarinfo = tarfile.TarInfo("manifest.json")
+        tarinfo.size = len(data)
+        tar.addfile(tarinfo, io.BytesIO(data))
+        contents["manifest.json"] = data
+
+        for size in FILE_SIZES:
+            tar.add(tmp_path / f"file_{size}.bin", arcname=f"file_{size}.bin")
+    return archive, contents
+
+def read_archive(archive):
+    with tarfile.open(archive) as tar:
+        return {member.name: tar.extractfile(member).read() for member in tar}
+
+@pytest.mark.skipif(not hasattr(os, "sendfile"), reason="os.sendfile not available")
+def test_sendfile_round_trip(tmp_path, monkeypatch):
+    """Regular files copied with os.sendfile read back intact"""
+    calls = []
+    sendfile = os.sendfile
+
+    def counting_sendfile(*args):
+        calls.append(args)
+        return sendfile(*args)
+
+    monkeypatch.setattr(os, "sendfile", counting_sendfile)
+    archive, contents = write_archive(tmp_path)
+
+    assert calls
+    assert read_archive(archive) == contents
+
+def test_stream_without_internals_falls_back(tmp_path, monkeypatch):
+    """A tar stream missing the expected internals is written with addfile()"""
+    monkeypatch.setattr(backup, "_STREAM_ATTRS", backup._STREAM_ATTRS + ("missing",))
+    monkeypatch.setattr(_BackupTarFile, "_sendfile_member",
+                        lambda *args: pytest.fail("sendfile path used"))
+    archive, contents = write_archive(tmp_path)
+
+    assert read_archive(archive) == contents
@@ -8,213 +8,302 @@ Provides detailed feedback on configuration issues and suggestions for optimizat
 
 import json
 import os
+import re
+import stat
 import sys
 import argparse
-from typing import Dict, List, Optional, Any, Tuple
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Dict, FrozenSet, List, NamedTuple, Optional, Any, Tuple
 from pathlib import Path
 from dataclasses import dataclass
 
+try:
+    import fastjsonschema
+except ImportError:
+    fastjsonschema = None
 
-@dataclass
-class ValidationResult:
-    """Result of a configuration validation."""
-    is_valid: bool
-    errors: List[str]
-    warnings: List[str]
-    suggestions: List[str]
+from _compat import SLOTS as _SLOTS, loads as _loads
 
 
-class HeliosConfigValidator:
-    """Main configuration validator for Helios."""
-    
-    def __init__(self):
-        self.vscode_schema = self._get_vscode_settings_schema()
-        self.server_schema = self._get_server_config_schema()
-    
-    def _validate_dict_against_schema(self, data: Dict[str, Any], schema: Dict[str, Any]) -> None:
-        """Simple schema validation without external dependencies."""
-        if schema.get("type") == "object" and "properties" in schema:
-            for key, value in data.items():
-                if key in schema["properties"]:
-                    prop_schema = schema["properties"][key]
-                    self._validate_value_against_schema(value, prop_schema, key)
-    
-    def _validate_value_against_schema(self, value: Any, schema: Dict[str, Any], field_name: str) -> None:
-        """Validate a single value against its schema."""
-        if "type" in schema:
-            expected_type = schema["type"]
-            if expected_type == "string" and not isinstance(value, str):
-                raise ValueError(f"Field '{field_name}' must be a string")
-            elif expected_type == "integer" and not isinstance(value, int):
-                raise ValueError(f"Field '{field_name}' must be an integer")
-            elif expected_type == "number" and not isinstance(value, (int, float)):
-                raise ValueError(f"Field '{field_name}' must be a number")
-            elif expected_type == "boolean" and not isinstance(value, bool):
-                raise ValueError(f"Field '{field_name}' must be a boolean")
-            elif expected_type == "array" and not isinstance(value, list):
-                raise ValueError(f"Field '{field_name}' must be an array")
-        
-        if "minimum" in schema and isinstance(value, (int, float)):
-            if value < schema["minimum"]:
-                raise ValueError(f"Field '{field_name}' must be >= {schema['minimum']}")
-        
-        if "maximum" in schema and isinstance(value, (int, float)):
-            if value > schema["maximum"]:
-                raise ValueError(f"Field '{field_name}' must be <= {schema['maximum']}")
-        
-        if "enum" in schema and value not in schema["enum"]:
-            raise ValueError(f"Field '{field_name}' must be one of {schema['enum']}")
-        
-        if "pattern" in schema and isinstance(value, str):
-            import re
-            if not re.match(schema["pattern"], value):
-                raise ValueError(f"Field '{field_name}' does not match required pattern")
-
-    def _get_vscode_settings_schema(self) -> Dict[str, Any]:
-        """Get JSON schema for VS Code settings validation."""
-        return {
+# JSON schema for VS Code settings validation
+_VSCODE_SCHEMA: Dict[str, Any] = {
+    "type": "object",
+    "properties": {
+        "helios.enabled": {
+            "type": "boolean",
+            "description": "Enable/disable Helios extension"
+        },
+        "helios.serverUrl": {
+            "type": "string",
+            "pattern": "^https?://",
+            "description": "Helios server URL"
+        },
+        "helios.autoComplete": {
+            "type": "boolean",
+            "description": "Enable automatic code completion"
+        },
+        "helios.maxCompletionLength": {
+            "type": "integer",
+            "minimum": 10,
+            "maximum": 1000,
+            "description": "Maximum completion length in characters"
+        },
+        "helios.completionDelay": {
+            "type": "integer",
+            "minimum": 0,
+            "maximum": 5000,
+            "description": "Delay before showing completion in milliseconds"
+        },
+        "helios.temperature": {
+            "type": "number",
+            "minimum": 0.0,
+            "maximum": 2.0,
+            "description": "Model temperature for completion"
+        },
+        "helios.enableMetrics": {
+            "type": "boolean",
+            "description": "Enable metrics collection"
+        },
+        "helios.logLevel": {
+            "type": "string",
+            "enum": ("debug", "info", "warn", "error"),
+            "description": "Logging level"
+        },
+        "helios.excludePatterns": {
+            "type": "array",
+            "items": {
+                "type": "string"
+            },
+            "description": "File patterns to exclude from completion"
+        },
+        "helios.includedLanguages": {
+            "type": "array",
+            "items": {
+                "type": "string"
+            },
+            "description": "Programming languages to enable completion for"
+        }
+    },
+    "additionalProperties": True
+}
+
+# JSON schema for server configuration validation
+_SERVER_SCHEMA: Dict[str, Any] = {
+    "type": "object",
+    "properties": {
+        "host": {
+            "type": "string",
+            "description": "Server host address"
+        },
+        "port": {
+            "type": "integer",
+            "minimum": 1,
+            "maximum": 65535,
+            "description": "Server port number"
+        },
+        "model": {
             "type": "object",
             "properties": {
-                "helios.enabled": {
-                    "type": "boolean",
-                    "description": "Enable/disable Helios extension"
-                },
-                "helios.serverUrl": {
+                "name": {
                     "type": "string",
-                    "pattern": "^https?://.*",
-                    "description": "Helios server URL"
-                },
-                "helios.autoComplete": {
-                    "type": "boolean",
-                    "description": "Enable automatic code completion"
+                    "description": "Model name"
                 },
-                "helios.maxCompletionLength": {
-                    "type": "integer",
-                    "minimum": 10,
-                    "maximum": 1000,
-                    "description": "Maximum completion length in characters"
-                },
-                "helios.completionDelay": {
-                    "type": "integer",
-                    "minimum": 0,
-                    "maximum": 5000,
-                    "description": "Delay before showing completion in milliseconds"
-                },
-                "helios.temperature": {
+                "temperature": {
                     "type": "number",
                     "minimum": 0.0,
-                    "maximum": 2.0,
-                    "description": "Model temperature for completion"
-                },
-                "helios.enableMetrics": {
-                    "type": "boolean",
-                    "description": "Enable metrics collection"
-                },
-                "helios.logLevel": {
-                    "type": "string",
-                    "enum": ["debug", "info", "warn", "error"],
-                    "description": "Logging level"
+                    "maximum": 2.0
                 },
-                "helios.excludePatterns": {
-                    "type": "array",
-                    "items": {
-                        "type": "string"
-                    },
-                    "description": "File patterns to exclude from completion"
+                "max_tokens": {
+                    "type": "integer",
+                    "minimum": 1,
+                    "maximum": 4096
                 },
-                "helios.includedLanguages": {
-                    "type": "array",
-                    "items": {
-                        "type": "string"
-                    },
-                    "description": "Programming languages to enable completion for"
+                "context_length": {
+                    "type": "integer",
+                    "minimum": 512,
+                    "maximum": 32768
                 }
             },
-            "additionalProperties": True
-        }
-    
-    def _get_server_config_schema(self) -> Dict[str, Any]:
-        """Get JSON schema for server configuration validation."""
-        return {
+            "required": ["name"]
+        },
+        "ollama": {
             "type": "object",
             "properties": {
-                "host": {
+                "base_url": {
                     "type": "string",
-                    "description": "Server host address"
+                    "pattern": "^https?://"
                 },
-                "port": {
+                "timeout": {
                     "type": "integer",
                     "minimum": 1,
-                    "maximum": 65535,
-                    "description": "Server port number"
-                },
-                "model": {
-                    "type": "object",
-                    "properties": {
-                        "name": {
-                            "type": "string",
-                            "description": "Model name"
-                        },
-                        "temperature": {
-                            "type": "number",
-                            "minimum": 0.0,
-                            "maximum": 2.0
-                        },
-                        "max_tokens": {
-                            "type": "integer",
-                            "minimum": 1,
-                            "maximum": 4096
-                        },
-                        "context_length": {
-                            "type": "integer",
-                            "minimum": 512,
-                            "maximum": 32768
-                        }
-                    },
-                    "required": ["name"]
-                },
-                "ollama": {
-                    "type": "object",
-                    "properties": {
-                        "base_url": {
-                            "type": "string",
-                            "pattern": "^https?://.*"
-                        },
-                        "timeout": {
-                            "type": "integer",
-                            "minimum": 1,
-                            "maximum": 300
-                        }
-                    }
+                    "maximum": 300
+                }
+            }
+        },
+        "logging": {
+            "type": "object",
+            "properties": {
+                "level": {
+                    "type": "string",
+                    "enum": ("DEBUG", "INFO", "WARNING", "ERROR")
                 },
-                "logging": {
-                    "type": "object",
-                    "properties": {
-                        "level": {
-                            "type": "string",
-                            "enum": ["DEBUG", "INFO", "WARNING", "ERROR"]
-                        },
-                        "file": {
-                            "type": "string"
-                        }
-                    }
+                "file": {
+                    "type": "string"
+                }
+            }
+        },
+        "metrics": {
+            "type": "object",
+            "properties": {
+                "enabled": {
+                    "type": "boolean"
                 },
-                "metrics": {
-                    "type": "object",
-                    "properties": {
-                        "enabled": {
-                            "type": "boolean"
-                        },
-                        "port": {
-                            "type": "integer",
-                            "minimum": 1,
-                            "maximum": 65535
-                        }
-                    }
+                "port": {
+                    "type": "integer",
+                    "minimum": 1,
+                    "maximum": 65535
                 }
-            },
-            "required": ["host", "port", "model"]
+            }
         }
+    },
+    "required": ["host", "port", "model"]
+}
+
+
+# Effective user ID, for reading permissions off stat() results
+_EUID = os.geteuid() if hasattr(os, "geteuid") else None
+
+# Python type and description for each JSON schema type the fallback checker knows
+_TYPE_CHECKS: Dict[str, Tuple[Any, str]] = {
+    "string": (str, "a string"),
+    "integer": (int, "an integer"),
+    "number": ((int, float), "a number"),
+    "boolean": (bool, "a boolean"),
+    "array": (list, "an array"),
+}
+
+
+class _PropertyCheck(NamedTuple):
+    """Constraints of one schema property, resolved ahead of validation."""
+    type_check: Optional[Tuple[Any, str]]
+    minimum: Optional[float]
+    maximum: Optional[float]
+    enum: Optional[Tuple[Any, ...]]
+    enum_set: Optional[FrozenSet[Any]]
+    pattern: Optional["re.Pattern[str]"]
+
+
+def _check_property(value: Any, field_name: str, check: _PropertyCheck, errors: List[str]) -> None:
+    """Validate a single value against its resolved constraints, appending any errors."""
+    prefix = f"Schema validation error: Field '{field_name}'"
+    if check.type_check is not None:
+        python_type, description = check.type_check
+        # bool subclasses int, but JSON booleans are not numbers
+        if not isinstance(value, python_type) or (
+                value.__class__ is bool and python_type is not bool):
+            # The remaining constraints are meaningless for the wrong type
+            errors.append(f"{prefix} must be {description}")
+            return
+    
+    if isinstance(value, (int, float)):
+        if check.minimum is not None and value < check.minimum:
+            errors.append(f"{prefix} must be >= {check.minimum}")
+        if check.maximum is not None and value > check.maximum:
+            errors.append(f"{prefix} must be <= {check.maximum}")
+    
+    if check.enum_set is not None and value not in check.enum_set:
+        errors.append(f"{prefix} must be one of {list(check.enum)}")
+    
+    if check.pattern is not None and isinstance(value, str):
+        if not check.pattern.match(value):
+            errors.append(f"{prefix} does not match required pattern")
+
+
+def _compile_fallback(schema: Dict[str, Any]) -> Callable[[Any, List[str]], None]:
+    """Specialize the fallback checker to a schema, used when fastjsonschema is not installed.
+    
+    Only the top-level properties of an object schema are checked.
+    """
+    checks: Dict[str, _PropertyCheck] = {}
+    if schema.get("type") == "object":
+        for key, prop_schema in schema.get("properties", {}).items():
+            enum = prop_schema.get("enum")
+            pattern = prop_schema.get("pattern")
+            checks[key] = _PropertyCheck(
+                type_check=_TYPE_CHECKS.get(prop_schema.get("type")),
+                minimum=prop_schema.get("minimum"),
+                maximum=prop_schema.get("maximum"),
+                enum=tuple(enum) if enum is not None else None,
+                enum_set=frozenset(enum) if enum is not None else None,
+                pattern=re.compile(pattern, re.ASCII) if pattern is not None else None,
+            )
+    
+    def check(data: Any, errors: List[str]) -> None:
+        for key, value in data.items():
+            prop_check = checks.get(key)
+            if prop_check is not None:
+                _check_property(value, key, prop_check, errors)
+    return check
+
+
+def _compile_fastjsonschema(schema: Dict[str, Any]) -> Callable[[Any, List[str]], None]:
+    """Compile a schema with fastjsonschema, which stops at the first error."""
+    validate = fastjsonschema.compile(schema)
+    
+    def check(data: Any, errors: List[str]) -> None:
+        try:
+            validate(data)
+        except fastjsonschema.JsonSchemaException as e:
+            errors.append(f"Schema validation error: {e.message}")
+    return check
+
+
+@dataclass(frozen=True, **_SLOTS)
+class ValidationResult:
+    """Result of a configuration validation."""
+    is_valid: bool
+    errors: Tuple[str, ...]
+    warnings: Tuple[str, ...]
+    suggestions: Tuple[str, ...]
+    
+    @classmethod
+    def from_lists(cls, errors: List[str], warnings: List[str],
+                   suggestions: List[str]) -> "ValidationResult":
+        """Build a result from collected messages; valid when there are no errors."""
+        if not (errors or warnings or suggestions):
+            return _EMPTY_VALID
+        return cls(not errors, tuple(errors), tuple(warnings), tuple(suggestions))
+
+
+# Shared result for the common case of nothing to report
+_EMPTY_VALID = ValidationResult(True, (), (), ())
+
+
+class HeliosConfigValidator:
+    """Main configuration validator for Helios."""
+    
+    # Compiled schema validators, shared by every instance
+    _compiled_validators: Dict[str, Callable[[Any, List[str]], None]] = {}
+    
+    def __init__(self):
+        self.vscode_schema = _VSCODE_SCHEMA
+        self.server_schema = _SERVER_SCHEMA
+        self._vscode_validate = self._schema_validator("vscode", self.vscode_schema)
+        self._server_validate = self._schema_validator("server", self.server_schema)
+    
+    def _schema_validator(self, name: str, schema: Dict[str, Any]) -> Callable[[Any, List[str]], None]:
+        """Get a function appending schema errors for some data to a list.
+        
+        The schema is compiled with fastjsonschema when it is available;
+        otherwise the built-in checker is specialized to it, which reports
+        every error rather than the first.
+        """
+        validate = self._compiled_validators.get(name)
+        if validate is None:
+            compile_schema = _compile_fallback if fastjsonschema is None else _compile_fastjsonschema
+            validate = compile_schema(schema)
+            self._compiled_validators[name] = validate
+        return validate
     
     def validate_vscode_settings(self, settings: Dict[str, Any]) -> ValidationResult:
         """Validate VS Code settings for Helios."""
@@ -222,54 +311,43 @@ class HeliosConfigValidator:
         warnings = []
         suggestions = []
         
-        # Extract Helios-specific settings
-        helios_settings = {k: v for k, v in settings.items() if k.startswith('helios.')}
-        
-        try:
-            # Basic validation without jsonschema
-            self._validate_dict_against_schema(helios_settings, self.vscode_schema)
-        except ValueError as e:
-            errors.append(f"Schema validation error: {e.message}")
+        # The schema allows additional properties, so settings belonging to
+        # other extensions pass through without copying out the helios.* keys
+        self._vscode_validate(settings, errors)
         
         # Custom validation rules
-        if 'helios.serverUrl' in helios_settings:
-            url = helios_settings['helios.serverUrl']
+        url = settings.get('helios.serverUrl')
+        if url is not None:
             if not url.startswith(('http://', 'https://')):
                 errors.append("helios.serverUrl must start with http:// or https://")
             if url.endswith('/'):
                 warnings.append("helios.serverUrl should not end with a trailing slash")
         
-        if 'helios.temperature' in helios_settings:
-            temp = helios_settings['helios.temperature']
+        temp = settings.get('helios.temperature')
+        if temp is not None:
             if temp < 0.1:
                 warnings.append("Very low temperature may result in repetitive completions")
             elif temp > 1.5:
                 warnings.append("High temperature may result in inconsistent completions")
         
-        if 'helios.completionDelay' in helios_settings:
-            delay = helios_settings['helios.completionDelay']
-            if delay > 1000:
-                warnings.append("High completion delay may impact user experience")
+        delay = settings.get('helios.completionDelay')
+        if delay is not None and delay > 1000:
+            warnings.append("High completion delay may impact user experience")
         
         # Performance suggestions
-        if helios_settings.get('helios.enableMetrics', True):
+        if settings.get('helios.enableMetrics', True):
             suggestions.append("Consider disabling metrics in production for better performance")
         
-        if not helios_settings.get('helios.excludePatterns'):
+        if not settings.get('helios.excludePatterns'):
             suggestions.append("Consider adding exclude patterns for large files or binary files")
         
         # Check for required settings
         required_settings = ['helios.serverUrl']
         for setting in required_settings:
-            if setting not in helios_settings:
+            if setting not in settings:
                 warnings.append(f"Missing recommended setting: {setting}")
         
-        return ValidationResult(
-            is_valid=len(errors) == 0,
-            errors=errors,
-            warnings=warnings,
-            suggestions=suggestions
-        )
+        return ValidationResult.from_lists(errors, warnings, suggestions)
     
     def validate_server_config(self, config: Dict[str, Any]) -> ValidationResult:
         """Validate server configuration."""
@@ -277,11 +355,7 @@ class HeliosConfigValidator:
         warnings = []
         suggestions = []
         
-        try:
-            # Basic validation without jsonschema
-            self._validate_dict_against_schema(config, self.server_schema)
-        except ValueError as e:
-            errors.append(f"Schema validation error: {e.message}")
+        self._server_validate(config, errors)
         
         # Custom validation rules
         if 'port' in config:
@@ -307,12 +381,7 @@ class HeliosConfigValidator:
         if config.get('metrics', {}).get('enabled', False):
             suggestions.append("Metrics collection may impact performance in high-load scenarios")
         
-        return ValidationResult(
-            is_valid=len(errors) == 0,
-            errors=errors,
-            warnings=warnings,
-            suggestions=suggestions
-        )
+        return ValidationResult.from_lists(errors, warnings, suggestions)
     
     def validate_extension_manifest(self, manifest: Dict[str, Any]) -> ValidationResult:
         """Validate VS Code extension package.json."""
@@ -352,71 +421,81 @@ class HeliosConfigValidator:
                 if 'properties' not in config:
                     warnings.append("Configuration contribution should have properties")
         
-        return ValidationResult(
-            is_valid=len(errors) == 0,
-            errors=errors,
-            warnings=warnings,
-            suggestions=suggestions
-        )
+        return ValidationResult.from_lists(errors, warnings, suggestions)
     
-    def check_file_permissions(self, file_path: str) -> ValidationResult:
-        """Check file permissions and accessibility."""
+    def check_file_permissions(self, file_path: str) -> Tuple[ValidationResult, Optional[Any]]:
+        """Check file permissions and accessibility.
+        
+        Returns the result and, for a readable .json file that parsed, its contents.
+        """
         errors = []
         warnings = []
         suggestions = []
         
         path = Path(file_path)
         
-        if not path.exists():
+        # One stat() answers existence, file type and, usually, readability
+        try:
+            st = os.stat(file_path)
+        except OSError:
             errors.append(f"File does not exist: {file_path}")
-            return ValidationResult(False, errors, warnings, suggestions)
+            return ValidationResult.from_lists(errors, warnings, suggestions), None
         
-        if not path.is_file():
+        if not stat.S_ISREG(st.st_mode):
             errors.append(f"Path is not a file: {file_path}")
         
-        if not os.access(file_path, os.R_OK):
+        owner_readable = st.st_uid == _EUID and st.st_mode & stat.S_IRUSR
+        if not owner_readable and not os.access(file_path, os.R_OK):
             errors.append(f"File is not readable: {file_path}")
         
         # Check for common issues
-        if path.suffix == '.json':
+        data = None
+        if path.suffix == '.json' and not errors:
             try:
-                with open(file_path, 'r') as f:
-                    json.load(f)
+                data = _loads(path.read_bytes())
+            # orjson.JSONDecodeError subclasses json.JSONDecodeError
             except json.JSONDecodeError as e:
                 errors.append(f"Invalid JSON syntax: {e}")
         
-        return ValidationResult(
-            is_valid=len(errors) == 0,
-            errors=errors,
-            warnings=warnings,
-            suggestions=suggestions
-        )
+        return ValidationResult.from_lists(errors, warnings, suggestions), data
 
 
 def print_validation_result(result: ValidationResult, title: str) -> None:
     """Print validation result in a formatted way."""
-    print(f"\n{title}")
-    print("=" * len(title))
+    # Build the whole report and write it at once rather than line by line
+    lines = [f"\n{title}", "=" * len(title)]
     
     if result.is_valid:
-        print("✓ Configuration is valid")
+        lines.append("✓ Configuration is valid")
     else:
-        print("✗ Configuration has errors")
+        lines.append("✗ Configuration has errors")
     
     if result.errors:
-        print(f"\nErrors ({len(result.errors)}):")
-        for error in result.errors:
-            print(f"  ✗ {error}")
+        lines.append(f"\nErrors ({len(result.errors)}):")
+        lines.extend(f"  ✗ {error}" for error in result.errors)
     
     if result.warnings:
-        print(f"\nWarnings ({len(result.warnings)}):")
-        for warning in result.warnings:
-            print(f"  ⚠ {warning}")
+        lines.append(f"\nWarnings ({len(result.warnings)}):")
+        lines.extend(f"  ⚠ {warning}" for warning in result.warnings)
     
     if result.suggestions:
-        print(f"\nSuggestions ({len(result.suggestions)}):")
-        for suggestion in result.suggestions:
-            print(f"  💡 {suggestion}")
+        lines.append(f"\nSuggestions ({len(result.suggestions)}):")
+        lines.extend(f"  💡 {suggestion}" for suggestion in result.suggestions)
+    
+    lines.append("")
+    sys.stdout.write("\n".join(lines))
+
+
+def validate_file(validator: HeliosConfigValidator, file_path: str,
+                  validate: Callable[[Any], ValidationResult]) -> ValidationResult:
+    """Check a configuration file, then run a validator over its parsed contents."""
+    result, data = validator.check_file_permissions(file_path)
+    if not result.is_valid:
+        return result
+    if data is None:
+        # Only .json files are parsed by the permission check
+        data = _loads(Path(file_path).read_bytes())
+    return validate(data)
 
 
 def main():
@@ -426,6 +505,8 @@ def main():
     parser.add_argument("--server-config", help="Path to server configuration file")
     parser.add_argument("--extension-manifest", help="Path to extension package.json")
     parser.add_argument("--workspace", help="Validate entire workspace configuration")
+    parser.add_argument("--fail-fast", action="store_true",
+                        help="Stop at the first configuration with errors")
     
     args = parser.parse_args()
     
@@ -434,69 +515,51 @@ def main():
         sys.exit(1)
     
     validator = HeliosConfigValidator()
-    all_valid = True
+    
+    # (title, path, validator) for every file to check, in report order
+    jobs = []
+    if args.vscode_settings:
+        jobs.append(("VS Code Settings Validation", args.vscode_settings,
+                     validator.validate_vscode_settings))
+    if args.server_config:
+        jobs.append(("Server Configuration Validation", args.server_config,
+                     validator.validate_server_config))
+    if args.extension_manifest:
+        jobs.append(("Extension Manifest Validation", args.extension_manifest,
+                     validator.validate_extension_manifest))
+    
+    if args.workspace:
+        # Validate entire workspace, skipping files it does not have
+        workspace_path = Path(args.workspace)
+        workspace_files = [
+            ("Workspace VS Code Settings", workspace_path / ".vscode" / "settings.json",
+             validator.validate_vscode_settings),
+            ("Extension Package.json", workspace_path / "extension" / "package.json",
+             validator.validate_extension_manifest),
+            ("Server Configuration", workspace_path / "server" / "config.json",
+             validator.validate_server_config),
+        ]
+        jobs.extend((title, str(path), validate) for title, path, validate in workspace_files
+                    if path.exists())
     
     try:
-        if args.vscode_settings:
-            # Validate VS Code settings
-            result = validator.check_file_permissions(args.vscode_settings)
-            if result.is_valid:
-                with open(args.vscode_settings, 'r') as f:
-                    settings = json.load(f)
-                result = validator.validate_vscode_settings(settings)
-            print_validation_result(result, "VS Code Settings Validation")
-            all_valid = all_valid and result.is_valid
-        
-        if args.server_config:
-            # Validate server configuration
-            result = validator.check_file_permissions(args.server_config)
-            if result.is_valid:
-                with open(args.server_config, 'r') as f:
-                    config = json.load(f)
-                result = validator.validate_server_config(config)
-            print_validation_result(result, "Server Configuration Validation")
-            all_valid = all_valid and result.is_valid
-        
-        if args.extension_manifest:
-            # Validate extension manifest
-            result = validator.check_file_permissions(args.extension_manifest)
-            if result.is_valid:
-                with open(args.extension_manifest, 'r') as f:
-                    manifest = json.load(f)
-                result = validator.validate_extension_manifest(manifest)
-            print_validation_result(result, "Extension Manifest Validation")
-            all_valid = all_valid and result.is_valid
-        
-        if args.workspace:
-            # Validate entire workspace
-            workspace_path = Path(args.workspace)
-            
-            # Check VS Code settings
-            settings_path = workspace_path / ".vscode" / "settings.json"
-            if settings_path.exists():
-                with open(settings_path, 'r') as f:
-                    settings = json.load(f)
-                result = validator.validate_vscode_settings(settings)
-                print_validation_result(result, "Workspace VS Code Settings")
-                all_valid = all_valid and result.is_valid
-            
-            # Check extension manifest
-            manifest_path = workspace_path / "extension" / "package.json"
-            if manifest_path.exists():
-                with open(manifest_path, 'r') as f:
-                    manifest = json.load(f)
-                result = validator.validate_extension_manifest(manifest)
-                print_validation_result(result, "Extension Package.json")
-                all_valid = all_valid and result.is_valid
-            
-            # Check server config if exists
-            server_config_path = workspace_path / "server" / "config.json"
-            if server_config_path.exists():
-                with open(server_config_path, 'r') as f:
-                    config = json.load(f)
-                result = validator.validate_server_config(config)
-                print_validation_result(result, "Server Configuration")
-                all_valid = all_valid and result.is_valid
+        if args.fail_fast:
+            # Validate one file at a time so nothing after the first failure is read
+            results = (validate_file(validator, path, validate) for _, path, validate in jobs)
+        else:
+            # The files are independent, so read and validate them concurrently
+            # and report in order
+            with ThreadPoolExecutor(max_workers=max(len(jobs), 1)) as executor:
+                results = list(executor.map(
+                    lambda job: validate_file(validator, job[1], job[2]), jobs))
+        
+        all_valid = True
+        for (title, _, _), result in zip(jobs, results):
+            print_validation_result(result, title)
+            if not result.is_valid:
+                all_valid = False
+                if args.fail_fast:
+                    break
         
         print(f"\n{'='*50}")
         if all_valid: